@@ -1,3 +1,8 @@
 """Korea Trip Planner Backend API"""
 
+import time
+
+# Reference point for cold start measurements (the first app module to be imported)
+IMPORT_STARTED = time.perf_counter()
+
 __version__ = "0.1.0"
@@ -0,0 +1,31 @@
+"""Response compression that leaves streamed responses alone"""
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.types import Message, Receive, Scope, Send
+
+# Streamed incrementally (SSE events, NDJSON trip listings); Starlette's gzip
+# stream never flushes between chunks, so compressing them holds every event
+# back until the response ends
+STREAMING_MEDIA_TYPES = {"text/event-stream", "application/x-ndjson"}
+
+
+class StreamingAwareGZipResponder(GZipResponder):
+    async def send_with_gzip(self, message: Message):
+        await super().send_with_gzip(message)
+        if message["type"] == "http.response.start":
+            media_type = Headers(raw=message["headers"]).get("content-type", "").split(";")[0].strip()
+            if media_type in STREAMING_MEDIA_TYPES:
+                # Take GZipResponder's pass-through path for already encoded responses
+                self.content_encoding_set = True
+
+
+class StreamingAwareGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that doesn't compress event streams or NDJSON"""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http" and "gzip" in Headers(scope=scope).get("Accept-Encoding", ""):
+            responder = StreamingAwareGZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+            await responder(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
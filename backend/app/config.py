@@ -1,7 +1,7 @@
 """Application configuration management"""
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import List, Dict, Any
 
 
 class Settings(BaseSettings):
@@ -13,12 +13,97 @@ class Settings(BaseSettings):
     
     # Google Gemini API
     gemini_api_key: str
+    # Max Gemini calls in flight per worker
+    gemini_max_concurrency: int = 32
+    # Per-call timeout in seconds
+    gemini_timeout_seconds: float = 60.0
+    # Outbound rate limit for the shared API quota (0 disables) and the priority queue
+    gemini_rate_limit_per_minute: int = 60
+    gemini_rate_limit_burst: int = 10
+    gemini_max_queue: int = 200
+    # Max seconds a call may wait in the queue, per operation (not counted against the call timeout)
+    gemini_queue_deadlines: Dict[str, float] = {
+        "translate": 5.0,
+        "recommendations": 15.0,
+        "guide": 30.0,
+        "guide_job": 120.0,
+        "background": 120.0,
+    }
+    # Deadline, retry and hedging policy per operation (fields of resilience.CallPolicy);
+    # the timeout defaults to gemini_timeout_seconds
+    gemini_call_policies: Dict[str, Dict[str, Any]] = {
+        "translate": {"timeout": 15.0, "retries": 2, "hedge": True},
+        "recommendations": {"timeout": 30.0, "retries": 2, "hedge": True},
+        "guide": {"timeout": 60.0, "retries": 1},
+        "guide_job": {"timeout": 120.0, "retries": 2, "backoff_base": 2.0},
+        "background": {"timeout": 60.0, "retries": 3, "backoff_base": 2.0},
+    }
+    # Circuit breaker: consecutive failures before failing fast, seconds until a probe call
+    gemini_breaker_failures: int = 5
+    gemini_breaker_reset_seconds: float = 30.0
+    # Model tiers: prompts an operation routes as small go to the light model (empty disables)
+    gemini_model: str = "gemini-pro"
+    gemini_light_model: str = "gemini-1.5-flash"
+    # Routing and generation config per operation (fields of model_router.ModelRoute);
+    # prompt size is a local token estimate
+    gemini_model_routes: Dict[str, Dict[str, Any]] = {
+        "translate": {"light_max_prompt_tokens": 250, "max_output_tokens": 2048, "temperature": 0.2},
+        "recommendations": {"light_max_prompt_tokens": 250, "max_output_tokens": 1536, "temperature": 0.4},
+        "guide": {"max_output_tokens": 2048},
+        "guide_job": {"max_output_tokens": 4096},
+        "background": {"light_max_prompt_tokens": 250, "max_output_tokens": 1536, "temperature": 0.4},
+    }
+
+    # Translation cache: in-memory LRU plus optional SQLite file that survives restarts
+    translation_cache_size: int = 4096
+    translation_cache_ttl_seconds: int = 86400
+    translation_cache_path: str | None = None
+    # Batch translation: max characters of text packed into a single prompt (batches are
+    # also split so their answer fits the translate max_output_tokens)
+    translation_batch_max_chars: int = 4000
+    # WebSocket translation sessions: characters of recent utterances and translations kept
+    # as chat context, and seconds without an utterance before the socket is closed
+    translation_session_context_chars: int = 4000
+    translation_session_idle_seconds: float = 300.0
+    # Local phrasebook of common travel phrases and signs, answered without Gemini
+    # (path defaults to the bundled app/data/phrasebook.tsv)
+    phrasebook_enabled: bool = True
+    phrasebook_path: str | None = None
+    
+    # Recommendation cache: fresh for the TTL, then served stale while refreshing
+    recommendation_cache_size: int = 1024
+    recommendation_cache_ttl_seconds: int = 21600
+    recommendation_stale_ttl_seconds: int = 86400
+    # Startup warm-up (comma-separated; leave locations empty to disable)
+    recommendation_warmup_locations: str = "Seoul,Busan,Jeju,Gyeongju"
+    recommendation_warmup_categories: str = "restaurants,attractions,activities"
+    recommendation_warmup_languages: str = "en"
+    
+    # Semantic /ai-guide cache: a question reuses the answer to a near-duplicate one (cosine
+    # similarity of local embeddings at or above the threshold) asked with the same language,
+    # location, dates and preferences; size 0 disables. The optional SQLite file keeps answers
+    guide_cache_size: int = 2048
+    guide_cache_ttl_seconds: int = 86400
+    guide_cache_threshold: float = 0.85
+    guide_cache_path: str | None = None
+    # Background /ai-guide jobs: worker tasks per process, jobs waiting before submissions get
+    # 503, and seconds a job (and its result) is kept in the job store
+    guide_job_workers: int = 4
+    guide_job_max_queue: int = 100
+    guide_job_ttl_seconds: int = 86400
     
     # Firebase - supports both methods
     # Method 1: JSON string directly in environment variable (recommended for production)
     firebase_credentials_json: str | None = None
     # Method 2: Path to JSON file (for local development)
     firebase_credentials_path: str = "./firebase-credentials.json"
+    # Verified ID token cache size and signing certificate refresh interval (seconds)
+    token_cache_size: int = 10000
+    token_cert_refresh_seconds: int = 300
+    # Trip document cache; optional Firestore listeners keep cached trips in sync across workers
+    trip_cache_size: int = 1024
+    trip_cache_ttl_seconds: int = 30
+    trip_cache_listen: bool = False
     
     # CORS
     cors_origins: str = "http://localhost:3000,http://localhost:5173"
@@ -26,6 +111,16 @@ class Settings(BaseSettings):
     # Server
     host: str = "0.0.0.0"
     port: int = 8000
+    # Responses smaller than this (bytes) are sent uncompressed
+    gzip_minimum_size: int = 1024
+    
+    # Per-request profiling (the middleware is only installed when enabled).
+    # Requests with a matching X-Profile header, plus a random sample, are profiled
+    profiling_enabled: bool = False
+    profiling_token: str | None = None
+    profiling_sample_rate: float = 0.0
+    profiling_interval_ms: float = 1.0
+    profiling_output_dir: str = "./profiles"
     
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -37,6 +132,21 @@ class Settings(BaseSettings):
     def cors_origins_list(self) -> List[str]:
         """Parse CORS origins string into list"""
         return [origin.strip() for origin in self.cors_origins.split(",")]
+    
+    @property
+    def recommendation_warmup_locations_list(self) -> List[str]:
+        """Parse recommendation warm-up locations into list"""
+        return [item.strip() for item in self.recommendation_warmup_locations.split(",") if item.strip()]
+    
+    @property
+    def recommendation_warmup_categories_list(self) -> List[str]:
+        """Parse recommendation warm-up categories into list"""
+        return [item.strip() for item in self.recommendation_warmup_categories.split(",") if item.strip()]
+    
+    @property
+    def recommendation_warmup_languages_list(self) -> List[str]:
+        """Parse recommendation warm-up languages into list"""
+        return [item.strip() for item in self.recommendation_warmup_languages.split(",") if item.strip()]
 
 
 # Global settings instance
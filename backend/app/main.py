@@ -1,25 +1,66 @@
 """FastAPI application entry point"""
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 
+from app.compression import StreamingAwareGZipMiddleware
 from app.config import settings
+from app.metrics import (
+    CONTENT_TYPE_LATEST, MetricsMiddleware, record_startup, render_metrics, startup_timings, stats_collector
+)
+from app.profiling import ProfilingMiddleware
 from app.routers import translate, trips, ai_guide
 from app.services.firebase_service import firebase_service
+from app.services.gemini_service import gemini_service
+from app.services.guide_jobs import guide_jobs
+
+
+async def load_services():
+    """Import and initialize the Firebase and Gemini SDKs (and the guide cache) in parallel threads
+    
+    Runs in the background so the server accepts connections (and answers
+    /health) right away; requests that need a service wait for it on first use.
+    """
+    results = await asyncio.gather(
+        firebase_service.ensure_initialized(),
+        gemini_service.ensure_loaded(),
+        asyncio.to_thread(gemini_service.load_guide_cache),
+        return_exceptions=True
+    )
+    for name, result in zip(("Firebase", "Gemini", "Guide cache"), results):
+        if isinstance(result, Exception):
+            print(f"❌ {name} failed to load, retrying on first use: {result}")
+    if firebase_service.is_initialized:
+        print("🔥 Firebase initialized")
+    if gemini_service.is_loaded:
+        print("🤖 Gemini API configured")
+    if firebase_service.is_initialized and gemini_service.is_loaded:
+        record_startup("services_ready")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
-    # Startup: Initialize Firebase
-    firebase_service.initialize()
-    print("🔥 Firebase initialized")
-    print(f"🤖 Gemini API configured")
+    # Startup: the phrasebook is small and local, so it is ready before the first request
+    gemini_service.load_phrasebook()
+    # Startup: load the SDKs without delaying startup
+    services = asyncio.create_task(load_services())
+    cert_refresh = asyncio.create_task(firebase_service.refresh_public_keys_periodically())
+    # Warm the recommendation cache without delaying startup
+    warmup = asyncio.create_task(gemini_service.warm_recommendations())
+    # Workers for background /ai-guide jobs
+    guide_jobs.start()
     
     yield
     
     # Shutdown: Cleanup
+    await guide_jobs.stop()
+    services.cancel()
+    warmup.cancel()
+    cert_refresh.cancel()
     print("👋 Shutting down...")
 
 
@@ -28,9 +69,13 @@ app = FastAPI(
     title="Korea Trip Planner API",
     description="Backend API for Korea Trip Planner PWA",
     version="0.1.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
+# Compress responses above the size threshold for clients that accept gzip (streams are sent as is)
+app.add_middleware(StreamingAwareGZipMiddleware, minimum_size=settings.gzip_minimum_size, compresslevel=6)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -38,6 +83,41 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Cache-Status", "X-Next-Cursor", "ETag", "X-Gemini-Model", "X-Profile-File"],
+)
+
+# Opt-in request profiling; not installed at all unless enabled
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
+
+# Added last so it is outermost and times the whole request, including compression
+app.add_middleware(MetricsMiddleware)
+
+# Cache and queue counters are read when /metrics is scraped
+stats_collector.add_cache("translation", gemini_service.translation_cache.stats)
+stats_collector.add_cache(
+    "translation_disk",
+    lambda: gemini_service.translation_store.stats() if gemini_service.translation_store else None
+)
+stats_collector.add_cache("recommendations", gemini_service.recommendation_cache.stats)
+stats_collector.add_cache("guide_semantic", gemini_service.guide_cache_stats)
+stats_collector.add_cache("trips", firebase_service.trip_cache_stats)
+stats_collector.add_cache("id_tokens", firebase_service.token_cache_stats)
+stats_collector.add_gauge(
+    "gemini_queue_depth", "Gemini calls waiting for a rate limit token",
+    lambda: gemini_service.scheduler.stats()["queue_depth"]
+)
+stats_collector.add_gauge(
+    "gemini_circuit_open", "1 while the Gemini circuit breaker is failing fast",
+    lambda: 0 if gemini_service.breaker.state == "closed" else 1
+)
+stats_collector.add_gauge(
+    "guide_jobs_queued", "Background /ai-guide jobs waiting for a worker",
+    lambda: guide_jobs.stats()["queued"]
+)
+stats_collector.add_gauge(
+    "guide_jobs_running", "Background /ai-guide jobs being generated",
+    lambda: guide_jobs.stats()["running"]
 )
 
 # Include routers
@@ -56,16 +136,43 @@ async def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics (sync, so rendering runs off the event loop)"""
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Liveness check; answers as soon as the server is up"""
     return {
         "status": "healthy",
         "firebase": firebase_service.is_initialized,
-        "gemini": bool(settings.gemini_api_key)
+        "gemini": bool(settings.gemini_api_key),
+        "gemini_queue": gemini_service.scheduler.stats(),
+        "gemini_resilience": gemini_service.resilience_stats(),
+        "guide_jobs": guide_jobs.stats()
     }
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness check; 503 until Firebase and Gemini are loaded"""
+    ready = firebase_service.is_initialized and gemini_service.is_loaded
+    return ORJSONResponse(
+        {
+            "status": "ready" if ready else "starting",
+            "firebase": firebase_service.is_initialized,
+            "gemini": gemini_service.is_loaded,
+            "startup_seconds": startup_timings
+        },
+        status_code=200 if ready else 503
+    )
+
+
+record_startup("imported")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
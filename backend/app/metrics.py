@@ -0,0 +1,211 @@
+"""Prometheus metrics for requests and upstream calls"""
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, REGISTRY, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Any, Callable, Dict, Tuple
+from functools import wraps
+import inspect
+import time
+
+from app import IMPORT_STARTED
+
+# Upstream calls take from milliseconds (cache-like Firestore reads) to a minute (long AI answers)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template and status",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being handled")
+
+GEMINI_LATENCY = Histogram(
+    "gemini_call_duration_seconds",
+    "Gemini generate_content latency per attempt",
+    ["operation", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+GEMINI_IN_FLIGHT = Gauge("gemini_calls_in_flight", "Gemini calls currently running", ["operation"])
+GEMINI_PROMPT_CHARS = Histogram(
+    "gemini_prompt_chars", "Gemini prompt size in characters", ["operation"], buckets=SIZE_BUCKETS
+)
+GEMINI_RESPONSE_CHARS = Histogram(
+    "gemini_response_chars", "Gemini response size in characters", ["operation"], buckets=SIZE_BUCKETS
+)
+GEMINI_TOKENS = Counter(
+    "gemini_tokens", "Gemini tokens: output as reported, prompt_estimate from the local heuristic", ["operation", "kind"]
+)
+PHRASEBOOK_LOOKUPS = Counter(
+    "phrasebook_lookups", "Translations checked against the local phrasebook", ["result"]
+)
+GEMINI_MODEL_CALLS = Counter(
+    "gemini_model_calls", "Gemini calls by operation and routed model", ["operation", "model"]
+)
+
+# Background jobs can wait behind others and retry, so their buckets reach ten minutes
+JOB_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+GUIDE_JOB_WAIT = Histogram(
+    "guide_job_queue_wait_seconds", "Time background /ai-guide jobs wait for a worker", buckets=JOB_BUCKETS
+)
+GUIDE_JOB_LATENCY = Histogram(
+    "guide_job_duration_seconds",
+    "Background /ai-guide job latency from submission to result, by final status",
+    ["status"],
+    buckets=JOB_BUCKETS
+)
+
+TRANSLATION_SESSIONS = Gauge("translation_sessions_open", "Open WebSocket translation sessions")
+
+STARTUP_SECONDS = Gauge(
+    "app_startup_seconds",
+    "Seconds from importing the app package to each cold start milestone",
+    ["milestone"]
+)
+# Milestone -> seconds, also reported on /ready
+startup_timings: Dict[str, float] = {}
+
+# Probe and scrape requests don't count as the first request
+PROBE_PATHS = {"/health", "/ready", "/metrics"}
+
+FIREBASE_LATENCY = Histogram(
+    "firebase_call_duration_seconds",
+    "FirebaseService method latency (Firestore and token verification)",
+    ["method", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+
+
+def record_startup(milestone: str):
+    """Record a cold start milestone (imported, services_ready, first_request) once"""
+    if milestone in startup_timings:
+        return
+    seconds = time.perf_counter() - IMPORT_STARTED
+    startup_timings[milestone] = round(seconds, 4)
+    STARTUP_SECONDS.labels(milestone).set(seconds)
+    print(f"⏱️ Startup: {milestone} after {seconds * 1000:.0f} ms")
+
+
+def response_token_count(response: Any) -> int:
+    """Output tokens reported on a generate_content response, or 0 when not reported"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        return getattr(usage, "candidates_token_count", 0) or 0
+    try:
+        return sum(candidate.token_count for candidate in response.candidates)
+    except (AttributeError, TypeError, ValueError):
+        return 0
+
+
+def observe_firebase(func: Callable) -> Callable:
+    """Record the latency of a FirebaseService coroutine or async generator method"""
+    histogram = {
+        outcome: FIREBASE_LATENCY.labels(method=func.__name__, outcome=outcome)
+        for outcome in ("ok", "error")
+    }
+
+    if inspect.isasyncgenfunction(func):
+        @wraps(func)
+        async def stream(*args, **kwargs):
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                async for item in func(*args, **kwargs):
+                    yield item
+                outcome = "ok"
+            finally:
+                histogram[outcome].observe(time.perf_counter() - started)
+        return stream
+
+    @wraps(func)
+    async def call(*args, **kwargs):
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await func(*args, **kwargs)
+            outcome = "ok"
+            return result
+        finally:
+            histogram[outcome].observe(time.perf_counter() - started)
+    return call
+
+
+class StatsCollector:
+    """Exports existing hit/miss and queue counters at scrape time, so hot paths pay nothing"""
+
+    def __init__(self):
+        self._caches: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+
+    def add_cache(self, name: str, stats: Callable[[], Dict[str, Any]]):
+        """Register a cache whose stats() has hits, misses and size"""
+        self._caches[name] = stats
+
+    def add_gauge(self, name: str, documentation: str, value: Callable[[], float]):
+        """Register a gauge read from a callable"""
+        self._gauges[name] = (documentation, value)
+
+    def collect(self):
+        hits = CounterMetricFamily("cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Cache misses", labels=["cache"])
+        size = GaugeMetricFamily("cache_entries", "Entries currently cached", labels=["cache"])
+        for name, stats in self._caches.items():
+            values = stats()
+            if not values:
+                continue
+            hits.add_metric([name], values.get("hits", 0))
+            misses.add_metric([name], values.get("misses", 0))
+            size.add_metric([name], values.get("size", 0))
+        yield from (hits, misses, size)
+        for name, (documentation, value) in self._gauges.items():
+            yield GaugeMetricFamily(name, documentation, value=value())
+
+
+stats_collector = StatsCollector()
+REGISTRY.register(stats_collector)
+
+
+def render_metrics() -> bytes:
+    """Current metrics in the Prometheus text format"""
+    return generate_latest(REGISTRY)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing HTTP requests by route template
+
+    The route label is the matched path template (e.g. /api/v1/trips/{trip_id}),
+    so label cardinality stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            if "first_request" not in startup_timings and scope["path"] not in PROBE_PATHS:
+                record_startup("first_request")
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status
+            ).observe(time.perf_counter() - started)
@@ -1,15 +1,21 @@
 """Data models for the application"""
 
-from .trip import Trip, TripCreate, TripUpdate
-from .translation import TranslationRequest, TranslationResponse
-from .ai_guide import AIGuideRequest, AIGuideResponse
+from .trip import Trip, TripCreate, TripUpdate, TripBulkOperation, TripBulkRequest, TripBulkResult
+from .translation import TranslationRequest, TranslationResponse, BatchTranslationRequest
+from .ai_guide import AIGuideRequest, AIGuideResponse, AIGuideJobRequest, AIGuideJob
 
 __all__ = [
     "Trip",
     "TripCreate",
     "TripUpdate",
+    "TripBulkOperation",
+    "TripBulkRequest",
+    "TripBulkResult",
     "TranslationRequest",
     "TranslationResponse",
+    "BatchTranslationRequest",
     "AIGuideRequest",
     "AIGuideResponse",
+    "AIGuideJobRequest",
+    "AIGuideJob",
 ]
@@ -1,7 +1,7 @@
 """AI Guide data models"""
 
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Literal
 from datetime import datetime
 
 
@@ -31,3 +31,22 @@ class AIGuideResponse(BaseModel):
     recommendations: List[Recommendation] = Field(default_factory=list)
     language: str
     generated_at: datetime = Field(default_factory=datetime.utcnow)
+    cached: bool = Field(default=False, description="Answer to a near-identical earlier question from the semantic cache")
+
+
+class AIGuideJobRequest(AIGuideRequest):
+    """Request model for a background AI travel guide job"""
+    trip_id: Optional[str] = Field(None, description="Trip to save the answer on when the job succeeds (requires authentication)")
+
+
+class AIGuideJob(BaseModel):
+    """Background AI travel guide job and, once it succeeds, its answer"""
+    id: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    request: AIGuideJobRequest
+    result: Optional[AIGuideResponse] = None
+    error: Optional[str] = None
+    trip_saved: Optional[bool] = Field(None, description="Whether the answer was saved on the trip (null without a trip_id)")
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
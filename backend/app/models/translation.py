@@ -1,7 +1,7 @@
 """Translation data models"""
 
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, List
 
 
 class TranslationRequest(BaseModel):
@@ -12,6 +12,11 @@ class TranslationRequest(BaseModel):
     context: Optional[str] = Field(None, description="Additional context for better translation")
 
 
+class BatchTranslationRequest(BaseModel):
+    """Request model for translating many texts at once"""
+    items: List[TranslationRequest] = Field(..., min_length=1, max_length=100)
+
+
 class TranslationResponse(BaseModel):
     """Response model for translation"""
     original_text: str
@@ -19,3 +24,5 @@ class TranslationResponse(BaseModel):
     source_lang: str
     target_lang: str
     confidence: Optional[float] = None
+    cached: bool = Field(default=False, description="Served from the translation cache")
+    phrasebook: bool = Field(default=False, description="Answered from the local phrasebook without calling Gemini")
@@ -1,9 +1,11 @@
 """Trip data models"""
 
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
 
+from app.models.ai_guide import AIGuideResponse
+
 
 class TripBase(BaseModel):
     """Base trip model"""
@@ -36,6 +38,29 @@ class Trip(TripBase):
     created_by: str
     created_at: datetime
     updated_at: datetime
+    # Saved by a background /ai-guide job submitted with this trip's ID
+    ai_guide: Optional[AIGuideResponse] = None
     
     class Config:
         from_attributes = True
+
+
+class TripBulkOperation(BaseModel):
+    """Single create/update/delete operation in a bulk trip request"""
+    op: Literal["create", "update", "delete"]
+    id: Optional[str] = Field(None, description="Trip ID (required for update and delete)")
+    data: Optional[Dict[str, Any]] = Field(None, description="TripCreate fields for create, TripUpdate fields for update")
+
+
+class TripBulkRequest(BaseModel):
+    """Request model for bulk trip mutations"""
+    operations: List[TripBulkOperation] = Field(..., min_length=1, max_length=2000)
+
+
+class TripBulkResult(BaseModel):
+    """Result of a single bulk operation"""
+    index: int
+    op: str
+    id: Optional[str] = None
+    success: bool
+    error: Optional[str] = None
@@ -0,0 +1,146 @@
+"""Opt-in per-request sampling profiler writing collapsed stacks for flame graphs"""
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from collections import Counter
+from datetime import datetime
+from typing import List
+import asyncio
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+from app.config import settings
+
+MAX_DEPTH = 128
+
+
+def _label(frame) -> str:
+    """Flame graph label for a frame (no ';', which separates frames in collapsed stacks)"""
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}".replace(";", ",")
+
+
+class RequestSampler:
+    """Samples the stack of one asyncio task from a background thread
+
+    While the task is running, the event loop thread's stack (trimmed to the
+    task's own frames) is recorded, so synchronous work such as validation and
+    serialization shows up. While it is suspended, its await chain is recorded
+    with an `[await]` leaf, so time spent waiting on Firestore or Gemini shows
+    up too. Work in child tasks (e.g. asyncio.gather) or thread pools appears
+    as time awaiting them.
+    """
+
+    def __init__(self, task: asyncio.Task, interval: float):
+        self.task = task
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            stack = self._sample()
+            if stack:
+                self.samples[";".join(stack)] += 1
+
+    def _sample(self) -> List[str]:
+        coro = self.task.get_coro()
+        root = getattr(coro, "cr_frame", None)
+        if root is None:
+            return []
+
+        # Running: the root coroutine frame is on the loop thread's stack
+        frame = sys._current_frames().get(self._thread_id)
+        running: List[str] = []
+        while frame is not None and len(running) < MAX_DEPTH:
+            running.append(_label(frame))
+            if frame is root:
+                return running[::-1]
+            frame = frame.f_back
+
+        # Suspended: follow the chain of awaited coroutines and async generators
+        stack: List[str] = []
+        while coro is not None and len(stack) < MAX_DEPTH:
+            frame = getattr(coro, "cr_frame", None) or getattr(coro, "ag_frame", None) or getattr(coro, "gi_frame", None)
+            if frame is None:
+                break
+            stack.append(_label(frame))
+            coro = getattr(coro, "cr_await", None) or getattr(coro, "ag_await", None) or getattr(coro, "gi_yieldfrom", None)
+        stack.append("[await]")
+        return stack
+
+    def collapsed(self) -> str:
+        """Samples in collapsed-stack format (`frame;frame;frame count` per line)"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def _write_profile(path: str, content: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+class ProfilingMiddleware:
+    """Profiles requests carrying the X-Profile token, or a random sample of requests
+
+    Only installed when PROFILING_ENABLED is set, so it costs nothing otherwise.
+    Each profile is written to PROFILING_OUTPUT_DIR as a `.folded` file, which
+    flamegraph.pl, speedscope or inferno render directly; its name is returned
+    in the X-Profile-File response header.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    def _should_profile(self, scope: Scope) -> bool:
+        if settings.profiling_token:
+            for name, value in scope["headers"]:
+                if name == b"x-profile":
+                    # Compared as bytes: compare_digest rejects non-ASCII str
+                    return hmac.compare_digest(value, settings.profiling_token.encode("utf-8"))
+        return settings.profiling_sample_rate > 0 and random.random() < settings.profiling_sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        name = "{}-{}-{}.folded".format(
+            datetime.utcnow().strftime("%Y%m%dT%H%M%S%f"),
+            scope["method"],
+            re.sub(r"[^A-Za-z0-9_.-]", "_", scope["path"].strip("/")) or "root"
+        )
+
+        async def send_with_header(message: Message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-profile-file", name.encode())]
+            await send(message)
+
+        sampler = RequestSampler(asyncio.current_task(), settings.profiling_interval_ms / 1000)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            sampler.stop()
+            path = os.path.join(settings.profiling_output_dir, name)
+            elapsed = time.perf_counter() - started
+            try:
+                await asyncio.to_thread(_write_profile, path, sampler.collapsed())
+                print(f"🔬 Profiled {scope['method']} {scope['path']} ({elapsed * 1000:.1f} ms): {path}")
+            except OSError as e:
+                print(f"⚠️ Could not write profile {path}: {e}")
@@ -0,0 +1,20 @@
+"""Response classes shared by the routers"""
+
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from typing import Any
+
+
+class ModelResponse(ORJSONResponse):
+    """orjson response for results that are already validated Pydantic models
+
+    Returning it from a route skips FastAPI's response_model re-validation,
+    so service results are serialized once.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            content = content.model_dump()
+        elif isinstance(content, list):
+            content = [item.model_dump() if isinstance(item, BaseModel) else item for item in content]
+        return super().render(content)
@@ -1,13 +1,34 @@
 """AI Travel Guide API router"""
 
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Any, Optional
+from datetime import datetime
+import asyncio
+import json
 
-from app.models.ai_guide import AIGuideRequest, AIGuideResponse, Recommendation
+from app.config import settings
+from app.models.ai_guide import AIGuideRequest, AIGuideResponse, AIGuideJob, AIGuideJobRequest, Recommendation
+from app.responses import ModelResponse
+from app.services.cache import make_etag, etag_matches
+from app.routers.trips import verify_user
+from app.services.firebase_service import firebase_service
 from app.services.gemini_service import gemini_service
+from app.services.guide_jobs import FINISHED, JobQueueFull, guide_jobs
+from app.services.scheduler import RateLimitExceeded
+from app.services.resilience import CircuitOpenError
+from app.services.model_router import track_models, model_headers
 
 router = APIRouter()
 
+# Seconds between keep-alive comments on job event streams, so proxies don't close idle connections
+JOB_KEEPALIVE_SECONDS = 15.0
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format a Server-Sent Events message with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
 
 @router.post("/ai-guide", response_model=AIGuideResponse)
 async def get_travel_guide(request: AIGuideRequest):
@@ -19,19 +40,158 @@ async def get_travel_guide(request: AIGuideRequest):
     - **location**: Specific location in Korea (optional)
     - **trip_dates**: Start and end dates (optional)
     - **preferences**: User preferences like food, culture, nature (optional)
+    
+    Near-duplicate questions asked with the same options are answered from a
+    semantic cache (`cached: true`, Cache-Status `guide-cache; hit`).
     """
+    models = track_models()
     try:
         result = await gemini_service.get_travel_guide(request)
-        return result
+        cache_status = "guide-cache; hit" if result.cached else "guide-cache; fwd=miss"
+        return ModelResponse(result, headers={"Cache-Status": cache_status, **model_headers(models)})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="AI guide timed out")
+    except RateLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI guide error: {str(e)}")
 
 
+@router.post("/ai-guide/stream")
+async def stream_travel_guide(request: AIGuideRequest):
+    """
+    Stream AI travel guidance as Server-Sent Events
+    
+    Takes the same body as `/ai-guide`. Emits `chunk` events (`{"text": ...}`)
+    as the answer is generated, then a final `done` event with the query,
+    language and `generated_at`, or an `error` event if generation fails.
+    """
+    async def events():
+        try:
+            async for text in gemini_service.stream_travel_guide(request):
+                yield sse_event("chunk", {"text": text})
+            yield sse_event("done", {
+                "query": request.query,
+                "language": request.language,
+                "generated_at": datetime.utcnow().isoformat()
+            })
+        except asyncio.TimeoutError:
+            yield sse_event("error", {"detail": "AI guide timed out"})
+        except (RateLimitExceeded, CircuitOpenError) as e:
+            yield sse_event("error", {"detail": str(e)})
+        except Exception as e:
+            yield sse_event("error", {"detail": f"AI guide error: {str(e)}"})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/ai-guide/jobs", response_model=AIGuideJob, status_code=202)
+async def submit_travel_guide_job(
+    request: AIGuideJobRequest,
+    http_request: Request,
+    authorization: Optional[str] = Header(None)
+):
+    """
+    Queue AI travel guidance as a background job (for long itineraries)
+    
+    Takes the `/ai-guide` body plus an optional **trip_id**, and returns the
+    queued job right away (202, with its URL in Location). Poll
+    `GET /ai-guide/jobs/{job_id}` or subscribe to `/ai-guide/jobs/{job_id}/events`
+    for the result. With a trip_id the answer is also saved on the trip as
+    `ai_guide`; this requires a Bearer token of the trip's creator or a participant.
+    """
+    user_id = None
+    if request.trip_id:
+        user_id = await verify_user(authorization)
+        trip = await firebase_service.get_trip(request.trip_id)
+        if not trip:
+            raise HTTPException(status_code=404, detail="Trip not found")
+        if user_id != trip.get("created_by") and user_id not in (trip.get("participants") or []):
+            raise HTTPException(status_code=403, detail="Not a member of this trip")
+    
+    try:
+        job = await guide_jobs.submit(request, user_id)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    location = http_request.url_for("get_travel_guide_job", job_id=job["id"])
+    return ModelResponse(AIGuideJob(**job), status_code=202, headers={"Location": str(location)})
+
+
+async def find_job(job_id: str) -> dict:
+    """Look up a job, with 404 for unknown or expired IDs"""
+    try:
+        job = await guide_jobs.get(job_id)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Job store error: {str(e)}")
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/ai-guide/jobs/{job_id}", response_model=AIGuideJob)
+async def get_travel_guide_job(job_id: str, wait: float = Query(0, ge=0, le=30)):
+    """
+    Get a background AI guide job: its status, then its result or error
+    
+    - **wait**: Seconds to hold the request until the status changes (long polling)
+    """
+    job = await find_job(job_id)
+    if wait and job["status"] not in FINISHED:
+        job = await guide_jobs.wait(job_id, job["status"], wait) or job
+    return ModelResponse(AIGuideJob(**job), headers={"Cache-Control": "no-store"})
+
+
+@router.get("/ai-guide/jobs/{job_id}/events")
+async def stream_travel_guide_job(job_id: str):
+    """
+    Subscribe to a background AI guide job as Server-Sent Events
+    
+    Emits a `status` event with the job on every status change, then a final
+    `done` event with the finished job, or an `error` event if it failed.
+    """
+    job = await find_job(job_id)
+    
+    async def events():
+        current = job
+        yield sse_event("status", AIGuideJob(**current).model_dump(mode="json"))
+        while current["status"] not in FINISHED:
+            try:
+                latest = await guide_jobs.wait(job_id, current["status"], JOB_KEEPALIVE_SECONDS)
+            except Exception as e:
+                yield sse_event("error", {"detail": f"Job store error: {str(e)}"})
+                return
+            if latest is None:
+                yield sse_event("error", {"detail": "Job not found"})
+                return
+            if latest["status"] == current["status"]:
+                yield ": keep-alive\n\n"
+                continue
+            current = latest
+            yield sse_event("status", AIGuideJob(**current).model_dump(mode="json"))
+        if current["status"] == "succeeded":
+            yield sse_event("done", AIGuideJob(**current).model_dump(mode="json"))
+        else:
+            yield sse_event("error", {"detail": current.get("error") or "AI guide job failed"})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/recommendations/{category}/{location}", response_model=List[Recommendation])
 async def get_recommendations(
     category: str,
     location: str,
-    language: str = "en"
+    language: str = "en",
+    if_none_match: Optional[str] = Header(None)
 ):
     """
     Get recommendations for a specific category and location
@@ -39,9 +199,32 @@ async def get_recommendations(
     - **category**: Type of recommendation (restaurants, attractions, activities)
     - **location**: Location in Korea
     - **language**: Response language (ko or en)
+    
+    Responses carry an ETag and Cache-Control reflecting the cached entry's
+    freshness; a matching If-None-Match returns 304.
     """
+    models = track_models()
     try:
-        result = await gemini_service.get_recommendations(category, location, language)
-        return result
+        result, age = await gemini_service.get_recommendations_with_age(category, location, language)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Recommendations timed out")
+    except RateLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Recommendations error: {str(e)}")
+    
+    max_age = max(0, int(settings.recommendation_cache_ttl_seconds - age))
+    headers = {
+        "ETag": make_etag(*(item.model_dump_json() for item in result)),
+        # Empty results are not cached by the service, so don't let clients cache them either
+        "Cache-Control": (
+            f"public, max-age={max_age}, stale-while-revalidate={settings.recommendation_stale_ttl_seconds}"
+            if result else "no-cache"
+        ),
+        **model_headers(models)
+    }
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return ModelResponse(result, headers=headers)
@@ -1,13 +1,47 @@
 """Translation API router"""
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, WebSocket, WebSocketDisconnect
+from typing import List, Optional, Tuple, Any
+import asyncio
+import itertools
+import json
 
-from app.models.translation import TranslationRequest, TranslationResponse
+from app.config import settings
+from app.metrics import TRANSLATION_SESSIONS
+from app.models.translation import TranslationRequest, TranslationResponse, BatchTranslationRequest
+from app.responses import ModelResponse
+from app.routers.trips import verify_user
 from app.services.gemini_service import gemini_service
+from app.services.scheduler import RateLimitExceeded
+from app.services.resilience import CircuitOpenError
+from app.services.model_router import track_models, model_headers
 
 router = APIRouter()
 
 
+def cache_status(result: TranslationResponse) -> str:
+    """RFC 9211 Cache-Status header value for a translation result"""
+    if result.phrasebook:
+        return "phrasebook; hit"
+    return "translation-cache; hit" if result.cached else "translation-cache; fwd=miss"
+
+
+def ws_event(event: str, message_id: Any, **data: Any) -> str:
+    """Format a translation session message as JSON text"""
+    return json.dumps({"type": event, "id": message_id, **data}, ensure_ascii=False)
+
+
+def parse_utterance(raw: str, default_id: int) -> Tuple[Any, str]:
+    """Read (id, text) from a `{"id": ..., "text": ...}` message; any other frame is the text itself"""
+    try:
+        message = json.loads(raw)
+    except ValueError:
+        message = None
+    if isinstance(message, dict):
+        return message.get("id", default_id), str(message.get("text") or "").strip()
+    return default_id, raw.strip()
+
+
 @router.post("/translate", response_model=TranslationResponse)
 async def translate_text(request: TranslationRequest):
     """
@@ -17,9 +51,110 @@ async def translate_text(request: TranslationRequest):
     - **source_lang**: Source language code (ko, en, ja, zh, auto)
     - **target_lang**: Target language code (ko, en, ja, zh)
     - **context**: Optional context for better translation
+    
+    The X-Gemini-Model response header names the model that translated the
+    text (short texts go to a lighter model); it is absent for cache hits.
     """
+    models = track_models()
     try:
         result = await gemini_service.translate(request)
-        return result
+        return ModelResponse(result, headers={"Cache-Status": cache_status(result), **model_headers(models)})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Translation timed out")
+    except RateLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Translation error: {str(e)}")
+
+
+@router.post("/translate/batch", response_model=List[TranslationResponse])
+async def translate_batch(request: BatchTranslationRequest):
+    """
+    Translate many texts at once (e.g. menu items or itinerary lines)
+    
+    - **items**: Up to 100 translation requests; items with the same language
+      pair are translated together in a single Gemini call
+    
+    Results are returned in the same order as the items.
+    """
+    models = track_models()
+    try:
+        result = await gemini_service.translate_batch(request.items)
+        return ModelResponse(result, headers=model_headers(models))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Translation timed out")
+    except RateLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Translation error: {str(e)}")
+
+
+@router.websocket("/translate/ws")
+async def translation_session(
+    websocket: WebSocket,
+    target_lang: str,
+    source_lang: str = "auto",
+    context: Optional[str] = None
+):
+    """
+    Translate a live conversation over a WebSocket
+    
+    Query parameters set the languages (with a source language, utterances
+    in either language are translated into the other) and optional context.
+    Send each utterance as `{"id": ..., "text": ...}` or as plain text. The
+    reply streams as `chunk` messages (`{"type": "chunk", "id", "text"}`),
+    then a `done` message with the full `translated_text`, or an `error`
+    message; the session stays open either way. Recent turns are kept as
+    context for the next ones.
+    """
+    await websocket.accept()
+    session = gemini_service.start_translation_session(source_lang, target_lang, context)
+    with TRANSLATION_SESSIONS.track_inprogress():
+        try:
+            for number in itertools.count(1):
+                try:
+                    raw = await asyncio.wait_for(
+                        websocket.receive_text(), timeout=settings.translation_session_idle_seconds
+                    )
+                except asyncio.TimeoutError:
+                    await websocket.close(code=1000, reason="Idle timeout")
+                    return
+                message_id, text = parse_utterance(raw, number)
+                if not text:
+                    await websocket.send_text(ws_event("error", message_id, detail="Empty utterance"))
+                    continue
+                chunks = []
+                try:
+                    async for chunk in session.translate(text):
+                        chunks.append(chunk)
+                        await websocket.send_text(ws_event("chunk", message_id, text=chunk))
+                except WebSocketDisconnect:
+                    raise
+                except asyncio.TimeoutError:
+                    await websocket.send_text(ws_event("error", message_id, detail="Translation timed out"))
+                except (RateLimitExceeded, CircuitOpenError) as e:
+                    await websocket.send_text(ws_event("error", message_id, detail=str(e)))
+                except Exception as e:
+                    await websocket.send_text(ws_event("error", message_id, detail=f"Translation error: {str(e)}"))
+                else:
+                    await websocket.send_text(
+                        ws_event("done", message_id, translated_text="".join(chunks).strip())
+                    )
+        except WebSocketDisconnect:
+            pass
+
+
+@router.get("/translate/cache/stats")
+async def get_translation_cache_stats(authorization: Optional[str] = Header(None)):
+    """
+    Translation cache hit/miss counters for the in-memory and on-disk tiers
+    
+    Requires authentication via Bearer token in Authorization header.
+    The same counters are exported on /metrics.
+    """
+    await verify_user(authorization)
+    return gemini_service.translation_cache_stats()
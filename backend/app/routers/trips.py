@@ -1,9 +1,15 @@
 """Trips API router"""
 
-from fastapi import APIRouter, HTTPException, Header
+from fastapi import APIRouter, HTTPException, Header, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
 from typing import List, Optional
+from datetime import datetime, timezone
+import json
 
-from app.models.trip import Trip, TripCreate, TripUpdate
+from app.models.trip import Trip, TripCreate, TripUpdate, TripBulkRequest, TripBulkResult
+from app.services.cache import make_etag, etag_matches
 from app.services.firebase_service import firebase_service
 
 router = APIRouter()
@@ -15,6 +21,11 @@ async def verify_user(authorization: Optional[str] = Header(None)) -> str:
         raise HTTPException(status_code=401, detail="Missing or invalid authorization header")
     
     token = authorization.split(" ")[1]
+    try:
+        # Firebase is initialized in the background at startup; early requests wait for it here
+        await firebase_service.ensure_initialized()
+    except Exception:
+        raise HTTPException(status_code=503, detail="Firebase is not available")
     user_data = await firebase_service.verify_token(token)
     
     if not user_data:
@@ -23,6 +34,98 @@ async def verify_user(authorization: Optional[str] = Header(None)) -> str:
     return user_data["uid"]
 
 
+# Fields that can be requested with ?fields= on trip listings
+TRIP_FIELDS = set(Trip.model_fields)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse a comma-separated field projection, always including the id"""
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = set(requested) - TRIP_FIELDS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown trip fields: {', '.join(sorted(unknown))}")
+    # Firestore returns all fields for an empty projection; "__name__" means "id only"
+    return [field for field in requested if field != "id"] or ["__name__"]
+
+
+def trip_version(trip: dict) -> str:
+    """Identify a trip revision by its id and updated_at (naive timestamps are UTC)"""
+    updated_at = trip.get("updated_at")
+    if isinstance(updated_at, datetime):
+        if updated_at.tzinfo is None:
+            updated_at = updated_at.replace(tzinfo=timezone.utc)
+        updated_at = updated_at.astimezone(timezone.utc).isoformat()
+    return f"{trip['id']}@{updated_at}"
+
+
+def trips_etag(trips: List[dict], variant: str) -> str:
+    """ETag for a page of trips; projected pages without updated_at hash their content"""
+    if all("updated_at" in trip for trip in trips):
+        return make_etag(variant, *(trip_version(trip) for trip in trips))
+    return make_etag(variant, json.dumps(jsonable_encoder(trips), sort_keys=True))
+
+
+def trip_page(
+    response: Response,
+    trips: List[dict],
+    limit: Optional[int],
+    projection: Optional[List[str]],
+    if_none_match: Optional[str],
+    variant: str
+):
+    """Return a page of trips with an ETag, setting X-Next-Cursor when the page is full"""
+    headers = {"ETag": trips_etag(trips, variant)}
+    if limit and len(trips) == limit:
+        headers["X-Next-Cursor"] = trips[-1]["id"]
+    
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    
+    if projection:
+        # Partial documents are not valid Trip models, so skip response validation
+        return JSONResponse(jsonable_encoder(trips), headers=headers)
+    response.headers.update(headers)
+    return trips
+
+
+async def list_trips(
+    response: Response,
+    field: str,
+    op: str,
+    user_id: str,
+    limit: Optional[int],
+    start_after: Optional[str],
+    fields: Optional[str],
+    stream: bool,
+    if_none_match: Optional[str]
+):
+    """Build a trip listing response: paginated, optionally projected or streamed as NDJSON"""
+    projection = parse_fields(fields)
+    trips = firebase_service.stream_trips(field, op, user_id, limit, start_after, projection)
+    
+    try:
+        # Fetch the first trip up front so a bad cursor fails before any body is sent
+        first = await anext(trips, None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if stream:
+        async def lines():
+            if first is None:
+                return
+            yield json.dumps(jsonable_encoder(first), ensure_ascii=False) + "\n"
+            async for trip in trips:
+                yield json.dumps(jsonable_encoder(trip), ensure_ascii=False) + "\n"
+        
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+    
+    results = [] if first is None else [first] + [trip async for trip in trips]
+    variant = f"{field}|{user_id}|{limit}|{start_after}|{fields}"
+    return trip_page(response, results, limit, projection, if_none_match, variant)
+
+
 @router.post("/trips", response_model=dict)
 async def create_trip(trip: TripCreate, authorization: Optional[str] = Header(None)):
     """
@@ -42,12 +145,113 @@ async def create_trip(trip: TripCreate, authorization: Optional[str] = Header(No
         raise HTTPException(status_code=500, detail=f"Error creating trip: {str(e)}")
 
 
+@router.post("/trips/bulk", response_model=List[TripBulkResult])
+async def bulk_trips(request: TripBulkRequest, authorization: Optional[str] = Header(None)):
+    """
+    Create, update and delete many trips in one request
+    
+    Requires authentication via Bearer token in Authorization header.
+    
+    - **operations**: List of `{"op": "create" | "update" | "delete", "id", "data"}`;
+      `data` holds TripCreate fields for create and TripUpdate fields for update
+    
+    Writes use Firestore batched writes. Results are returned per operation,
+    in the same order.
+    """
+    user_id = await verify_user(authorization)
+    
+    results: List[Optional[TripBulkResult]] = [None] * len(request.operations)
+    valid = []
+    for index, operation in enumerate(request.operations):
+        try:
+            if operation.op == "create":
+                data = TripCreate(**{**(operation.data or {}), "created_by": user_id}).model_dump()
+            elif not operation.id:
+                raise ValueError(f"id is required for {operation.op}")
+            elif operation.op == "update":
+                data = {k: v for k, v in TripUpdate(**(operation.data or {})).model_dump().items() if v is not None}
+                if not data:
+                    raise ValueError("No fields to update")
+            else:
+                data = None
+        except (ValidationError, ValueError) as e:
+            results[index] = TripBulkResult(index=index, op=operation.op, id=operation.id, success=False, error=str(e))
+            continue
+        valid.append((index, {"op": operation.op, "id": operation.id, "data": data}))
+    
+    if valid:
+        try:
+            written = await firebase_service.bulk_write_trips([operation for _, operation in valid])
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error writing trips: {str(e)}")
+        
+        for (index, operation), outcome in zip(valid, written):
+            results[index] = TripBulkResult(
+                index=index,
+                op=operation["op"],
+                id=outcome["id"],
+                success=outcome["error"] is None,
+                error=outcome["error"]
+            )
+    
+    return results
+
+
+@router.get("/trips/me", response_model=List[Trip])
+async def get_all_my_trips(
+    response: Response,
+    authorization: Optional[str] = Header(None),
+    limit: Optional[int] = Query(None, ge=1, le=100, description="Page size"),
+    start_after: Optional[str] = Query(None, description="Cursor: ID of the last trip of the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (e.g. id,title,start_date,end_date)"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Get every trip the user created or participates in, ordered by start date
+    
+    Requires authentication via Bearer token in Authorization header.
+    Replaces calling `/trips` and `/trips/participant/me` separately: both
+    queries run concurrently and trips appearing in both are returned once.
+    Supports the same pagination and projection options as `/trips`.
+    """
+    user_id = await verify_user(authorization)
+    projection = parse_fields(fields)
+    
+    try:
+        trips = await firebase_service.get_all_user_trips(user_id, limit, start_after, projection)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching trips: {str(e)}")
+    
+    variant = f"me|{user_id}|{limit}|{start_after}|{fields}"
+    return trip_page(response, trips, limit, projection, if_none_match, variant)
+
+
+@router.get("/trips/cache/stats")
+async def get_trip_cache_stats(authorization: Optional[str] = Header(None)):
+    """
+    Trip cache hit ratio and staleness of served entries
+    
+    Requires authentication via Bearer token in Authorization header.
+    The same counters are exported on /metrics.
+    """
+    await verify_user(authorization)
+    return firebase_service.trip_cache_stats()
+
+
 @router.get("/trips/{trip_id}", response_model=Trip)
-async def get_trip(trip_id: str, authorization: Optional[str] = Header(None)):
+async def get_trip(
+    trip_id: str,
+    response: Response,
+    authorization: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None)
+):
     """
     Get a trip by ID
     
-    Requires authentication via Bearer token in Authorization header
+    Requires authentication via Bearer token in Authorization header.
+    Responses carry an ETag; a matching If-None-Match returns 304.
     """
     await verify_user(authorization)
     
@@ -56,6 +260,10 @@ async def get_trip(trip_id: str, authorization: Optional[str] = Header(None)):
     if not trip:
         raise HTTPException(status_code=404, detail="Trip not found")
     
+    etag = make_etag(trip_version(trip))
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return trip
 
 
@@ -102,32 +310,53 @@ async def delete_trip(trip_id: str, authorization: Optional[str] = Header(None))
 
 
 @router.get("/trips", response_model=List[Trip])
-async def get_user_trips(authorization: Optional[str] = Header(None)):
+async def get_user_trips(
+    response: Response,
+    authorization: Optional[str] = Header(None),
+    limit: Optional[int] = Query(None, ge=1, le=100, description="Page size"),
+    start_after: Optional[str] = Query(None, description="Cursor: ID of the last trip of the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (e.g. id,title,start_date,end_date)"),
+    stream: bool = Query(False, description="Stream trips as NDJSON"),
+    if_none_match: Optional[str] = Header(None)
+):
     """
-    Get all trips for the authenticated user
+    Get trips for the authenticated user, ordered by start date
     
-    Requires authentication via Bearer token in Authorization header
+    Requires authentication via Bearer token in Authorization header.
+    When a page is full, the `X-Next-Cursor` header holds the `start_after`
+    value for the next page.
     """
     user_id = await verify_user(authorization)
     
     try:
-        trips = await firebase_service.get_user_trips(user_id)
-        return trips
+        return await list_trips(response, "created_by", "==", user_id, limit, start_after, fields, stream, if_none_match)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching trips: {str(e)}")
 
 
 @router.get("/trips/participant/me", response_model=List[Trip])
-async def get_participant_trips(authorization: Optional[str] = Header(None)):
+async def get_participant_trips(
+    response: Response,
+    authorization: Optional[str] = Header(None),
+    limit: Optional[int] = Query(None, ge=1, le=100, description="Page size"),
+    start_after: Optional[str] = Query(None, description="Cursor: ID of the last trip of the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (e.g. id,title,start_date,end_date)"),
+    stream: bool = Query(False, description="Stream trips as NDJSON"),
+    if_none_match: Optional[str] = Header(None)
+):
     """
-    Get all trips where the user is a participant
+    Get trips where the user is a participant, ordered by start date
     
-    Requires authentication via Bearer token in Authorization header
+    Requires authentication via Bearer token in Authorization header.
+    Supports the same pagination, projection and streaming options as `/trips`.
     """
     user_id = await verify_user(authorization)
     
     try:
-        trips = await firebase_service.get_trips_by_participant(user_id)
-        return trips
+        return await list_trips(response, "participants", "array_contains", user_id, limit, start_after, fields, stream, if_none_match)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching participant trips: {str(e)}")
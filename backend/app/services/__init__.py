@@ -2,5 +2,6 @@
 
 from .firebase_service import firebase_service
 from .gemini_service import gemini_service
+from .guide_jobs import guide_jobs
 
-__all__ = ["firebase_service", "gemini_service"]
+__all__ = ["firebase_service", "gemini_service", "guide_jobs"]
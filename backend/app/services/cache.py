@@ -0,0 +1,174 @@
+"""In-process caches shared by the services"""
+
+from collections import OrderedDict
+from typing import Optional, Any, Tuple, Dict, List
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Normalize text for use in a cache key (Unicode NFC, collapsed whitespace)"""
+    if not text:
+        return ""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def make_key(*parts: Any) -> str:
+    """Build a content-addressed cache key from its parts"""
+    raw = "\x1f".join("" if part is None else str(part) for part in parts)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a strong ETag header value from its parts"""
+    return f'"{make_key(*parts)[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison, per RFC 9110)"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+class TTLCache:
+    """Bounded in-memory LRU cache with per-entry expiry"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> (stored_at, expires_at, value), oldest first
+        self._data: "OrderedDict[str, Tuple[float, float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_with_age(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Get (value, age in seconds) for a live entry, or None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[2], now - entry[0]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a live entry's value"""
+        found = self.get_with_age(key)
+        return default if found is None else found[0]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a value, evicting the least recently used entry when full"""
+        if self.maxsize <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._data[key] = (now, now + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: str) -> Any:
+        """Remove an entry, returning its value if present"""
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return None if entry is None else entry[2]
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SQLiteCache:
+    """Persistent string cache backed by a local SQLite file
+
+    Calls are blocking; run them off the event loop (e.g. asyncio.to_thread).
+    """
+
+    def __init__(self, path: str, ttl: float):
+        self.path = path
+        self.ttl = ttl
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.purge_expired()
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a live entry's value"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None):
+        """Store a value"""
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at)
+            )
+            self._conn.commit()
+
+    def items(self) -> List[Tuple[str, str, float]]:
+        """All live entries as (key, value, seconds left), e.g. to restore an in-memory index"""
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value, expires_at FROM cache WHERE expires_at > ?", (now,)
+            ).fetchall()
+        return [(key, value, expires_at - now) for key, value, expires_at in rows]
+
+    def purge_expired(self) -> int:
+        """Delete expired rows, returning how many were removed"""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and hit/miss counters"""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -1,27 +1,70 @@
 """Firebase service for authentication and Firestore operations"""
 
-import firebase_admin
-from firebase_admin import credentials, firestore, auth
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, AsyncIterator, TYPE_CHECKING
+from collections import OrderedDict
 from datetime import datetime
+import asyncio
+import hashlib
 import json
 import os
+import threading
+import time
 
 from app.config import settings
+from app.services.cache import TTLCache
+from app.metrics import observe_firebase
+
+if TYPE_CHECKING:
+    # firebase_admin is slow to import, so it is only imported when initialize() runs
+    import firebase_admin
+    from firebase_admin import firestore, firestore_async
+
+
+# Maximum number of writes in a single Firestore batch
+FIRESTORE_BATCH_LIMIT = 500
 
 
 class FirebaseService:
     """Service for Firebase operations"""
     
     def __init__(self):
-        self._app: Optional[firebase_admin.App] = None
-        self._db: Optional[firestore.Client] = None
+        self._app: Optional["firebase_admin.App"] = None
+        self._db: Optional["firestore_async.AsyncClient"] = None
+        # firebase_admin.auth, set by initialize()
+        self._auth: Any = None
         self.is_initialized = False
+        self._init_lock = threading.Lock()
+        # Verified ID tokens keyed by SHA-256 of the token; each entry expires with the token
+        self._token_cache = TTLCache(maxsize=settings.token_cache_size, ttl=0)
+        # Read-through cache of trip documents by ID
+        self._trip_cache = TTLCache(maxsize=settings.trip_cache_size, ttl=settings.trip_cache_ttl_seconds)
+        self._trip_cache_served = 0
+        self._trip_cache_age_total = 0.0
+        self._trip_cache_age_max = 0.0
+        # [generation, readers] of trips being read from Firestore; the generation is
+        # bumped when the trip changes, so a read that started earlier isn't cached
+        self._trip_reads: Dict[str, List[int]] = {}
+        # Optional snapshot listeners (sync client; AsyncClient has no on_snapshot)
+        self._watch_db: Optional["firestore.Client"] = None
+        self._trip_watches: "OrderedDict[str, Any]" = OrderedDict()
     
     def initialize(self):
-        """Initialize Firebase Admin SDK"""
-        if self.is_initialized:
-            return
+        """Initialize Firebase Admin SDK
+        
+        Blocking (it imports the SDK); safe to call from several threads.
+        """
+        with self._init_lock:
+            if not self.is_initialized:
+                self._initialize()
+    
+    async def ensure_initialized(self):
+        """Initialize on first use without blocking the event loop; raises if initialization fails"""
+        if not self.is_initialized:
+            await asyncio.to_thread(self.initialize)
+    
+    def _initialize(self):
+        import firebase_admin
+        from firebase_admin import auth, credentials, firestore, firestore_async
         
         try:
             # Try to load from environment variable first (for production/CI/CD)
@@ -46,84 +89,359 @@ class FirebaseService:
                 )
             
             self._app = firebase_admin.initialize_app(cred)
-            self._db = firestore.client()
+            self._auth = auth
+            # Async client: Firestore calls are awaited instead of blocking the event loop
+            self._db = firestore_async.client()
+            if settings.trip_cache_listen:
+                self._watch_db = firestore.client()
             self.is_initialized = True
         except Exception as e:
             print(f"❌ Firebase initialization error: {e}")
             raise
     
     @property
-    def db(self) -> firestore.Client:
+    def db(self) -> "firestore_async.AsyncClient":
         """Get Firestore client"""
         if not self._db:
             raise RuntimeError("Firebase not initialized. Call initialize() first.")
         return self._db
     
     # Trip operations
+    @observe_firebase
     async def create_trip(self, trip_data: Dict[str, Any]) -> str:
         """Create a new trip in Firestore"""
         trip_data["created_at"] = datetime.utcnow()
         trip_data["updated_at"] = datetime.utcnow()
         
         doc_ref = self.db.collection("trips").document()
-        doc_ref.set(trip_data)
+        await doc_ref.set(trip_data)
+        self._trip_cache.set(doc_ref.id, {**trip_data, "id": doc_ref.id})
         return doc_ref.id
     
+    @observe_firebase
     async def get_trip(self, trip_id: str) -> Optional[Dict[str, Any]]:
-        """Get a trip by ID"""
-        doc = self.db.collection("trips").document(trip_id).get()
+        """Get a trip by ID, served from the trip cache when possible"""
+        found = self._trip_cache.get_with_age(trip_id)
+        if found is not None:
+            data, age = found
+            self._trip_cache_served += 1
+            self._trip_cache_age_total += age
+            self._trip_cache_age_max = max(self._trip_cache_age_max, age)
+            return dict(data)
+        
+        read = self._trip_reads.setdefault(trip_id, [0, 0])
+        generation = read[0]
+        read[1] += 1
+        try:
+            doc = await self.db.collection("trips").document(trip_id).get()
+        finally:
+            read[1] -= 1
+            if not read[1]:
+                del self._trip_reads[trip_id]
         if doc.exists:
             data = doc.to_dict()
             data["id"] = doc.id
-            return data
+            # An update or delete during the read may have made it stale
+            if read[0] == generation:
+                self._trip_cache.set(trip_id, data)
+                self._watch_trip(trip_id)
+            return dict(data)
         return None
     
+    def _trip_changed(self, trip_id: str, data: Optional[Dict[str, Any]] = None):
+        """Replace (or with no data, drop) a cached trip, and keep reads in flight from caching their copy"""
+        if data is None:
+            self._trip_cache.pop(trip_id)
+        else:
+            self._trip_cache.set(trip_id, data)
+        read = self._trip_reads.get(trip_id)
+        if read is not None:
+            read[0] += 1
+    
+    @observe_firebase
     async def update_trip(self, trip_id: str, trip_data: Dict[str, Any]) -> bool:
         """Update a trip"""
         trip_data["updated_at"] = datetime.utcnow()
         
         doc_ref = self.db.collection("trips").document(trip_id)
-        doc_ref.update(trip_data)
+        try:
+            await doc_ref.update(trip_data)
+        finally:
+            # The next read reloads the full document rather than merging partial fields
+            self._trip_changed(trip_id)
         return True
     
+    @observe_firebase
     async def delete_trip(self, trip_id: str) -> bool:
         """Delete a trip"""
-        self.db.collection("trips").document(trip_id).delete()
+        try:
+            await self.db.collection("trips").document(trip_id).delete()
+        finally:
+            self._trip_changed(trip_id)
         return True
     
-    async def get_user_trips(self, user_id: str) -> List[Dict[str, Any]]:
-        """Get all trips for a user"""
-        trips = []
-        docs = self.db.collection("trips").where("created_by", "==", user_id).stream()
+    @observe_firebase
+    async def bulk_write_trips(self, operations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Apply many trip creates/updates/deletes with Firestore batched writes
+        
+        Each operation is {"op": "create" | "update" | "delete", "id": ..., "data": ...}.
+        Operations are committed in chunks of the Firestore batch limit. A chunk
+        is atomic, so when one fails its operations are retried one by one to
+        report which ones failed. Returns {"id", "error"} per operation, in order.
+        """
+        results = []
+        for start in range(0, len(operations), FIRESTORE_BATCH_LIMIT):
+            chunk = operations[start:start + FIRESTORE_BATCH_LIMIT]
+            batch = self.db.batch()
+            refs = [self._add_to_batch(batch, operation) for operation in chunk]
+            try:
+                await batch.commit()
+                chunk_results = [{"id": ref.id, "error": None} for ref in refs]
+            except Exception as e:
+                print(f"⚠️ Trip batch commit failed, applying operations individually: {e}")
+                chunk_results = await asyncio.gather(*(
+                    self._write_single(operation, ref) for operation, ref in zip(chunk, refs)
+                ))
+            
+            for operation, result in zip(chunk, chunk_results):
+                if operation["op"] == "create" and result["error"] is None:
+                    self._trip_cache.set(result["id"], {**operation["data"], "id": result["id"]})
+                else:
+                    self._trip_changed(result["id"])
+            results.extend(chunk_results)
+        return results
+    
+    def _add_to_batch(self, batch, operation: Dict[str, Any]):
+        """Stage one bulk operation on a write batch, returning its document reference"""
+        now = datetime.utcnow()
+        data = operation.get("data") or {}
+        if operation["op"] == "create":
+            ref = self.db.collection("trips").document()
+            data.update(created_at=now, updated_at=now)
+            batch.set(ref, data)
+        elif operation["op"] == "update":
+            ref = self.db.collection("trips").document(operation["id"])
+            data["updated_at"] = now
+            batch.update(ref, data)
+        else:
+            ref = self.db.collection("trips").document(operation["id"])
+            batch.delete(ref)
+        operation["data"] = data
+        return ref
+    
+    async def _write_single(self, operation: Dict[str, Any], ref) -> Dict[str, Any]:
+        """Apply one bulk operation on its own"""
+        try:
+            if operation["op"] == "create":
+                await ref.set(operation["data"])
+            elif operation["op"] == "update":
+                await ref.update(operation["data"])
+            else:
+                await ref.delete()
+            return {"id": ref.id, "error": None}
+        except Exception as e:
+            return {"id": ref.id, "error": str(e)}
+    
+    def _watch_trip(self, trip_id: str):
+        """Keep a cached trip in sync with changes made by other workers or clients"""
+        if self._watch_db is None or trip_id in self._trip_watches:
+            return
+        loop = asyncio.get_running_loop()
+        
+        def on_snapshot(snapshots, changes, read_time):
+            # Runs on the listener's thread; hand the update to the event loop
+            for snapshot in snapshots:
+                data = snapshot.to_dict() if snapshot.exists else None
+                loop.call_soon_threadsafe(self._apply_trip_snapshot, trip_id, data)
+        
+        try:
+            self._trip_watches[trip_id] = self._watch_db.collection("trips").document(trip_id).on_snapshot(on_snapshot)
+        except Exception as e:
+            print(f"⚠️ Trip listener error for {trip_id}: {e}")
+            return
+        # Bound the number of open listeners, closing the oldest first
+        while len(self._trip_watches) > settings.trip_cache_size:
+            _, watch = self._trip_watches.popitem(last=False)
+            watch.unsubscribe()
+    
+    def _apply_trip_snapshot(self, trip_id: str, data: Optional[Dict[str, Any]]):
+        """Replace or drop a cached trip after a snapshot listener update"""
+        if data is None:
+            self._trip_changed(trip_id)
+            watch = self._trip_watches.pop(trip_id, None)
+            if watch is not None:
+                watch.unsubscribe()
+        else:
+            self._trip_changed(trip_id, {**data, "id": trip_id})
+    
+    def token_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of the verified ID token cache"""
+        return self._token_cache.stats()
+    
+    def trip_cache_stats(self) -> Dict[str, Any]:
+        """Hit ratio and staleness (age of served entries, in seconds) of the trip cache"""
+        served = self._trip_cache_served
+        return {
+            **self._trip_cache.stats(),
+            "ttl_seconds": self._trip_cache.ttl,
+            "served_age_avg": round(self._trip_cache_age_total / served, 3) if served else 0.0,
+            "served_age_max": round(self._trip_cache_age_max, 3),
+            "listeners": len(self._trip_watches),
+        }
+    
+    @observe_firebase
+    async def stream_trips(
+        self,
+        field: str,
+        op: str,
+        value: Any,
+        limit: Optional[int] = None,
+        start_after: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield trips matching a filter, ordered by start_date, as Firestore returns them
+        
+        - **limit**: Page size
+        - **start_after**: ID of the last trip of the previous page (cursor)
+        - **fields**: Only return these fields (the id is always included)
+        
+        Ordering by start_date needs a composite index on (field, start_date);
+        deploy firestore.indexes.json at the repository root (see SETUP.md).
+        """
+        query = self.db.collection("trips").where(field, op, value).order_by("start_date")
+        if fields:
+            query = query.select(fields)
+        if start_after:
+            cursor = await self.db.collection("trips").document(start_after).get()
+            if not cursor.exists:
+                raise ValueError(f"Unknown cursor: {start_after}")
+            query = query.start_after(cursor)
+        if limit:
+            query = query.limit(limit)
         
-        for doc in docs:
+        async for doc in query.stream():
             data = doc.to_dict()
             data["id"] = doc.id
-            trips.append(data)
+            yield data
+    
+    async def get_user_trips(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        start_after: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get trips for a user"""
+        return [
+            trip async for trip in
+            self.stream_trips("created_by", "==", user_id, limit, start_after, fields)
+        ]
+    
+    async def get_trips_by_participant(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        start_after: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get trips where user is a participant"""
+        return [
+            trip async for trip in
+            self.stream_trips("participants", "array_contains", user_id, limit, start_after, fields)
+        ]
+    
+    @observe_firebase
+    async def get_all_user_trips(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        start_after: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get trips the user created or participates in, de-duplicated and ordered by start_date
         
-        return trips
+        Both queries run concurrently. Each fetches up to one page after the cursor,
+        so the merged page is exact.
+        """
+        if fields:
+            # start_date is needed to merge the two result sets in order
+            fields = sorted((set(fields) - {"__name__"}) | {"start_date"})
+        
+        created, joined = await asyncio.gather(
+            self.get_user_trips(user_id, limit, start_after, fields),
+            self.get_trips_by_participant(user_id, limit, start_after, fields)
+        )
+        
+        merged = {trip["id"]: trip for trip in created + joined}
+        trips = sorted(merged.values(), key=lambda trip: (trip["start_date"], trip["id"]))
+        return trips[:limit] if limit else trips
     
-    async def get_trips_by_participant(self, user_id: str) -> List[Dict[str, Any]]:
-        """Get all trips where user is a participant"""
-        trips = []
-        docs = self.db.collection("trips").where("participants", "array_contains", user_id).stream()
+    # Background /ai-guide job operations
+    @observe_firebase
+    async def create_guide_job(self, job_id: str, job_data: Dict[str, Any]):
+        """Store a new background guide job under its ID
         
-        for doc in docs:
+        `expires_at` can drive a Firestore TTL policy on the guide_jobs collection.
+        """
+        await self.db.collection("guide_jobs").document(job_id).set(job_data)
+    
+    @observe_firebase
+    async def update_guide_job(self, job_id: str, job_data: Dict[str, Any]):
+        """Update fields of a background guide job"""
+        await self.db.collection("guide_jobs").document(job_id).update(job_data)
+    
+    @observe_firebase
+    async def get_guide_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a background guide job by ID"""
+        doc = await self.db.collection("guide_jobs").document(job_id).get()
+        if doc.exists:
             data = doc.to_dict()
             data["id"] = doc.id
-            trips.append(data)
-        
-        return trips
+            return data
+        return None
     
     # User verification
+    @observe_firebase
     async def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
-        """Verify Firebase ID token"""
-        try:
-            decoded_token = auth.verify_id_token(token)
+        """Verify Firebase ID token, reusing earlier verifications until the token expires"""
+        cache_key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        decoded_token = self._token_cache.get(cache_key)
+        if decoded_token is not None:
             return decoded_token
+        
+        try:
+            # Signature checks (and cert fetches on a cold cache) are blocking
+            decoded_token = await asyncio.to_thread(self._auth.verify_id_token, token)
         except Exception as e:
             print(f"Token verification error: {e}")
             return None
+        
+        ttl = decoded_token.get("exp", 0) - time.time()
+        if ttl > 0:
+            self._token_cache.set(cache_key, decoded_token, ttl=ttl)
+        return decoded_token
+    
+    def _refresh_public_keys(self):
+        """Fetch Google's token signing certificates through the SDK's verifier
+        
+        The verifier's transport caches the certificates per their Cache-Control
+        header, so this only hits the network once the cached copy has expired.
+        firebase_admin has no public hook for this, hence the private access.
+        """
+        from firebase_admin import _token_gen
+        
+        verifier = self._auth._get_client(self._app)._token_verifier
+        verifier.request(_token_gen.ID_TOKEN_CERT_URI)
+    
+    async def refresh_public_keys_periodically(self):
+        """Keep the signing certificate cache warm so no request waits on a fetch"""
+        while True:
+            try:
+                await self.ensure_initialized()
+                await asyncio.to_thread(self._refresh_public_keys)
+            except Exception as e:
+                print(f"⚠️ Token certificate refresh error: {e}")
+            await asyncio.sleep(settings.token_cert_refresh_seconds)
 
 
 # Global Firebase service instance
@@ -1,39 +1,415 @@
 """Google Gemini AI service for translation and travel guidance"""
 
-import google.generativeai as genai
-from typing import Optional, List
+from typing import Optional, List, Any, AsyncIterator, Awaitable, Callable, Dict, Tuple, TYPE_CHECKING
 from datetime import datetime
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from functools import partial
+import asyncio
+import json
+import threading
+import time
 
 from app.config import settings
+from app.services.cache import TTLCache, SQLiteCache, make_key, normalize_text
+from app.services.scheduler import PriorityScheduler
+from app.metrics import (
+    GEMINI_IN_FLIGHT, GEMINI_LATENCY, GEMINI_MODEL_CALLS, GEMINI_PROMPT_CHARS, GEMINI_RESPONSE_CHARS,
+    GEMINI_TOKENS, PHRASEBOOK_LOOKUPS, response_token_count
+)
+from app.services.model_router import ModelChoice, choose_model, estimate_tokens, max_output_tokens, note_model
+from app.services.phrasebook import BUNDLED_PATH, Phrasebook
+from app.services.resilience import (
+    CallPolicy, CircuitBreaker, CircuitOpenError, LatencyTracker, call_with_resilience, is_retryable
+)
+
+if TYPE_CHECKING:
+    # google.generativeai is slow to import, so it is only imported when the model is loaded
+    import google.generativeai as genai
+    from app.services.semantic_cache import SemanticCache
 from app.models.translation import TranslationRequest, TranslationResponse
 from app.models.ai_guide import AIGuideRequest, AIGuideResponse, Recommendation
 
 
+LANG_NAMES = {
+    "ko": "Korean",
+    "en": "English",
+    "ja": "Japanese",
+    "zh": "Chinese",
+    "auto": "auto-detected language"
+}
+
+# Targets whose translations take about twice the tokens of Latin-script text
+WIDE_TARGET_LANGS = {"ko", "ja", "zh"}
+
+
+def batch_output_tokens(request: TranslationRequest) -> int:
+    """Estimated tokens of one item's translation in a batch answer, JSON quoting included"""
+    tokens = estimate_tokens(request.text)
+    if request.target_lang.strip().lower() in WIDE_TARGET_LANGS:
+        tokens *= 2
+    return tokens + 4
+
+
+def parse_json_output(text: str) -> Any:
+    """Parse JSON from model output, tolerating Markdown code fences"""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    return json.loads(text)
+
+
 class GeminiService:
     """Service for Google Gemini AI operations"""
     
-    def __init__(self):
-        self.model: Optional[genai.GenerativeModel] = None
-        self._configure()
+    def __init__(self, model_factory: Optional[Callable[[str], "genai.GenerativeModel"]] = None):
+        # Builds a model from its name. Can be injected (e.g. local fakes);
+        # otherwise the SDK is loaded on first use
+        self.model_factory = model_factory
+        self._models: Dict[str, "genai.GenerativeModel"] = {}
+        self._model_lock = threading.Lock()
+        # Calls use the SDK's async client, so a timeout cancels the request
+        # itself; the semaphore caps how many are in flight per worker
+        self._semaphore = asyncio.Semaphore(settings.gemini_max_concurrency)
+        # In-flight upstream calls by prompt key, shared by identical concurrent requests
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.coalesced_calls = 0
+        # Shared API quota: translate > recommendations > guide > guide jobs > background work
+        self.scheduler = PriorityScheduler(
+            rate=settings.gemini_rate_limit_per_minute / 60,
+            burst=settings.gemini_rate_limit_burst,
+            max_queue=settings.gemini_max_queue
+        )
+        self.translation_cache = TTLCache(
+            maxsize=settings.translation_cache_size,
+            ttl=settings.translation_cache_ttl_seconds
+        )
+        # Filled in at startup by load_phrasebook
+        self.phrasebook = Phrasebook()
+        self.translation_store: Optional[SQLiteCache] = None
+        if settings.translation_cache_path:
+            try:
+                self.translation_store = SQLiteCache(
+                    settings.translation_cache_path,
+                    ttl=settings.translation_cache_ttl_seconds
+                )
+            except Exception as e:
+                print(f"⚠️ Translation cache file unavailable, using memory only: {e}")
+        # Entries are kept past their fresh TTL so stale results can be served while refreshing
+        self.recommendation_cache = TTLCache(
+            maxsize=settings.recommendation_cache_size,
+            ttl=settings.recommendation_cache_ttl_seconds + settings.recommendation_stale_ttl_seconds
+        )
+        # Created by load_guide_cache, which imports NumPy in the background at startup
+        self.guide_cache: Optional["SemanticCache"] = None
+        self.guide_store: Optional[SQLiteCache] = None
+        self._refreshing: set = set()
+        self._background_tasks: set = set()
+        # Fail fast while Gemini is degraded; latency history drives the hedging delay
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.gemini_breaker_failures,
+            reset_timeout=settings.gemini_breaker_reset_seconds
+        )
+        self._latency: Dict[str, LatencyTracker] = defaultdict(LatencyTracker)
     
-    def _configure(self):
-        """Configure Gemini API"""
-        genai.configure(api_key=settings.gemini_api_key)
-        self.model = genai.GenerativeModel('gemini-pro')
+    @property
+    def is_loaded(self) -> bool:
+        return self.model_factory is not None
     
-    async def translate(self, request: TranslationRequest) -> TranslationResponse:
-        """Translate text using Gemini"""
-        
-        lang_names = {
-            "ko": "Korean",
-            "en": "English",
-            "ja": "Japanese",
-            "zh": "Chinese",
-            "auto": "auto-detected language"
+    def load(self):
+        """Import the SDK and configure the Gemini API
+        
+        Blocking; safe to call from several threads.
+        """
+        with self._model_lock:
+            if self.model_factory is None:
+                import google.generativeai as genai
+                genai.configure(api_key=settings.gemini_api_key)
+                self.model_factory = genai.GenerativeModel
+    
+    async def ensure_loaded(self):
+        """Load the SDK on first use without blocking the event loop"""
+        if self.model_factory is None:
+            await asyncio.to_thread(self.load)
+    
+    def model_for(self, name: str) -> "genai.GenerativeModel":
+        """The model for a tier name, created on first use"""
+        model = self._models.get(name)
+        if model is None:
+            if self.model_factory is None:
+                self.load()
+            with self._model_lock:
+                model = self._models.get(name)
+                if model is None:
+                    model = self._models[name] = self.model_factory(name)
+        return model
+    
+    def _policy(self, operation: str, timeout: Optional[float] = None) -> CallPolicy:
+        """Resilience policy for an operation, optionally with an explicit timeout"""
+        policy = CallPolicy(**{
+            "timeout": settings.gemini_timeout_seconds,
+            **settings.gemini_call_policies.get(operation, {})
+        })
+        if timeout:
+            policy.timeout = timeout
+        return policy
+    
+    async def _run(self, func, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Await an async SDK call under the concurrency cap
+        
+        A timeout cancels the call, so its slot is free again as soon as the
+        caller gives up.
+        """
+        timeout = timeout or settings.gemini_timeout_seconds
+        async with self._semaphore:
+            return await asyncio.wait_for(func(*args, **kwargs), timeout=timeout)
+    
+    async def _generate(self, prompt: str, operation: str, timeout: Optional[float] = None) -> str:
+        """Generate content for a prompt and return the stripped response text
+        
+        The model tier is chosen by prompt size (see model_router). Concurrent
+        calls of the same operation with the same prompt, model and generation
+        config share one upstream call (single-flight); its result or error is
+        delivered to every caller. Operations don't share calls, as their
+        deadlines and retries differ.
+        """
+        await self.ensure_loaded()
+        choice = choose_model(operation, prompt)
+        note_model(choice.model)
+        key = make_key(operation, choice.model, json.dumps(choice.generation_config, sort_keys=True), prompt)
+        task = self._inflight.get(key)
+        if task is None:
+            # Run as its own task so a disconnecting caller doesn't cancel it for the others
+            task = asyncio.ensure_future(self._generate_uncoalesced(prompt, operation, choice, timeout))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish_inflight(key, done))
+        else:
+            self.coalesced_calls += 1
+        return await asyncio.shield(task)
+    
+    def _finish_inflight(self, key: str, task: asyncio.Future):
+        """Forget a finished single-flight call"""
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            # Mark the exception retrieved in case every caller went away
+            task.exception()
+    
+    async def _generate_uncoalesced(
+        self,
+        prompt: str,
+        operation: str,
+        choice: ModelChoice,
+        timeout: Optional[float] = None
+    ) -> str:
+        """Call generate_content under the operation's deadline, retry, hedging and circuit breaker policy"""
+        policy = self._policy(operation, timeout)
+        model = self.model_for(choice.model)
+        
+        async def admit():
+            # Every attempt, retry or hedge spends its own quota token
+            await self.scheduler.acquire(operation, settings.gemini_queue_deadlines.get(operation))
+        
+        async def attempt() -> str:
+            with self._observe(operation, prompt, choice) as observe:
+                response = await self._run(
+                    model.generate_content_async, prompt,
+                    generation_config=choice.generation_config, timeout=policy.timeout
+                )
+                text = response.text.strip()
+                observe(len(text), response_token_count(response))
+            return text
+        
+        return await call_with_resilience(attempt, policy, self.breaker, self._latency[operation], admit)
+    
+    @contextmanager
+    def _observe(self, operation: str, prompt: str, choice: ModelChoice):
+        """Record latency, sizes, tokens and the routed model of one upstream call
+        
+        Yields a callback taking the response size in characters and output token count.
+        """
+        GEMINI_PROMPT_CHARS.labels(operation).observe(len(prompt))
+        GEMINI_TOKENS.labels(operation, "prompt_estimate").inc(choice.prompt_tokens)
+        GEMINI_MODEL_CALLS.labels(operation, choice.model).inc()
+        in_flight = GEMINI_IN_FLIGHT.labels(operation)
+        in_flight.inc()
+        started = time.perf_counter()
+        outcome = "error"
+        
+        def observe(chars: int, tokens: int = 0):
+            nonlocal outcome
+            outcome = "ok"
+            GEMINI_RESPONSE_CHARS.labels(operation).observe(chars)
+            if tokens:
+                GEMINI_TOKENS.labels(operation, "output").inc(tokens)
+        
+        try:
+            yield observe
+        finally:
+            in_flight.dec()
+            GEMINI_LATENCY.labels(operation, outcome).observe(time.perf_counter() - started)
+    
+    async def _generate_stream(
+        self,
+        prompt: str,
+        operation: str,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """Generate content for a prompt, yielding text chunks as they arrive"""
+        await self.ensure_loaded()
+        choice = choose_model(operation, prompt)
+        model = self.model_for(choice.model)
+        start = partial(model.generate_content_async, prompt, generation_config=choice.generation_config, stream=True)
+        async for text in self._stream(operation, prompt, choice, start, timeout):
+            yield text
+    
+    async def _stream(
+        self,
+        operation: str,
+        prompt: str,
+        choice: ModelChoice,
+        start: Callable[[], Awaitable[Any]],
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """Run an async streaming SDK call, yielding text chunks as they arrive
+        
+        `start` returns the streaming response; `prompt` is what it sends, for
+        metrics. The timeout applies to each chunk, so long answers are not
+        cut off. Streams are not retried or hedged (chunks may already have
+        been sent), but they respect and feed the circuit breaker.
+        """
+        timeout = timeout or self._policy(operation).timeout
+        if not self.breaker.allow():
+            raise CircuitOpenError("Gemini is temporarily unavailable")
+        await self.scheduler.acquire(operation, settings.gemini_queue_deadlines.get(operation))
+        async with self._semaphore:
+            with self._observe(operation, prompt, choice) as observe:
+                try:
+                    response = await asyncio.wait_for(start(), timeout=timeout)
+                except Exception as e:
+                    if is_retryable(e):
+                        self.breaker.record_failure()
+                    raise
+                self.breaker.record_success()
+                chunks = aiter(response)
+                streamed_chars, tokens = 0, 0
+                try:
+                    while True:
+                        chunk = await asyncio.wait_for(anext(chunks, None), timeout=timeout)
+                        if chunk is None:
+                            break
+                        tokens += response_token_count(chunk)
+                        if chunk.text:
+                            streamed_chars += len(chunk.text)
+                            yield chunk.text
+                finally:
+                    # Ends the upstream stream when the consumer stops early or a chunk times out
+                    await chunks.aclose()
+                observe(streamed_chars, tokens)
+    
+    def load_phrasebook(self):
+        """Load the local phrasebook; without it every translation goes to Gemini"""
+        if not settings.phrasebook_enabled:
+            return
+        try:
+            self.phrasebook.load(settings.phrasebook_path or BUNDLED_PATH)
+            print(f"📖 Phrasebook loaded: {len(self.phrasebook)} phrases")
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Phrasebook unavailable, translating everything with Gemini: {e}")
+    
+    def _phrasebook_translation(self, request: TranslationRequest) -> Optional[TranslationResponse]:
+        """Answer a known travel phrase locally (skipped when context is given, which may change the wording)"""
+        if not len(self.phrasebook) or request.context:
+            return None
+        found = self.phrasebook.lookup(request.text, request.source_lang, request.target_lang)
+        if found is None:
+            PHRASEBOOK_LOOKUPS.labels("miss").inc()
+            return None
+        translated_text, fuzzy = found
+        PHRASEBOOK_LOOKUPS.labels("fuzzy" if fuzzy else "exact").inc()
+        return TranslationResponse(
+            original_text=request.text,
+            translated_text=translated_text,
+            source_lang=request.source_lang,
+            target_lang=request.target_lang,
+            phrasebook=True
+        )
+    
+    def start_translation_session(
+        self,
+        source_lang: str,
+        target_lang: str,
+        context: Optional[str] = None
+    ) -> "TranslationSession":
+        """Start a conversational translation session (see TranslationSession)"""
+        return TranslationSession(self, source_lang, target_lang, context)
+    
+    def _translation_key(self, request: TranslationRequest) -> str:
+        """Cache key for the normalized (text, source_lang, target_lang, context) tuple"""
+        return make_key(
+            normalize_text(request.text),
+            request.source_lang.strip().lower(),
+            request.target_lang.strip().lower(),
+            normalize_text(request.context)
+        )
+    
+    async def _get_cached_translation(self, key: str) -> Optional[str]:
+        """Look up a translation in memory, then in the persistent tier"""
+        translated_text = self.translation_cache.get(key)
+        if translated_text is None and self.translation_store:
+            translated_text = await asyncio.to_thread(self.translation_store.get, key)
+            if translated_text is not None:
+                self.translation_cache.set(key, translated_text)
+        return translated_text
+    
+    async def _store_translation(self, key: str, translated_text: str):
+        """Store a translation in memory and in the persistent tier"""
+        self.translation_cache.set(key, translated_text)
+        if self.translation_store:
+            try:
+                await asyncio.to_thread(self.translation_store.set, key, translated_text)
+            except Exception as e:
+                print(f"⚠️ Translation cache write error: {e}")
+    
+    def resilience_stats(self) -> dict:
+        """Circuit breaker state and recent latency quantiles per operation"""
+        return {
+            "circuit": self.breaker.stats(),
+            "latency_p50": {op: round(tracker.quantile(0.5), 4) for op, tracker in self._latency.items()},
+            "latency_p95": {op: round(tracker.quantile(0.95), 4) for op, tracker in self._latency.items()},
+        }
+    
+    def translation_cache_stats(self) -> dict:
+        """Hit/miss counters for the translation cache tiers"""
+        return {
+            "memory": self.translation_cache.stats(),
+            "disk": self.translation_store.stats() if self.translation_store else None
         }
+    
+    async def translate(self, request: TranslationRequest) -> TranslationResponse:
+        """Translate text using the phrasebook, the cache or Gemini"""
+        
+        phrase = self._phrasebook_translation(request)
+        if phrase is not None:
+            return phrase
+        return await self._translate_with_model(request)
+    
+    async def _translate_with_model(self, request: TranslationRequest) -> TranslationResponse:
+        """Translate text from the cache or with Gemini"""
         
-        source = lang_names.get(request.source_lang, request.source_lang)
-        target = lang_names.get(request.target_lang, request.target_lang)
+        cache_key = self._translation_key(request)
+        cached_text = await self._get_cached_translation(cache_key)
+        if cached_text is not None:
+            return TranslationResponse(
+                original_text=request.text,
+                translated_text=cached_text,
+                source_lang=request.source_lang,
+                target_lang=request.target_lang,
+                cached=True
+            )
+        
+        source = LANG_NAMES.get(request.source_lang, request.source_lang)
+        target = LANG_NAMES.get(request.target_lang, request.target_lang)
         
         prompt = f"""Translate the following text from {source} to {target}.
 Only provide the translation, without any explanations or additional text.
@@ -45,8 +421,8 @@ Text to translate:
 
 Translation:"""
         
-        response = self.model.generate_content(prompt)
-        translated_text = response.text.strip()
+        translated_text = await self._generate(prompt, "translate")
+        await self._store_translation(cache_key, translated_text)
         
         return TranslationResponse(
             original_text=request.text,
@@ -55,8 +431,175 @@ Translation:"""
             target_lang=request.target_lang
         )
     
-    async def get_travel_guide(self, request: AIGuideRequest) -> AIGuideResponse:
-        """Get AI-powered travel guide recommendations"""
+    async def translate_batch(self, requests: List[TranslationRequest]) -> List[TranslationResponse]:
+        """Translate many texts, packing items with the same language pair into one Gemini call"""
+        
+        results: List[Optional[TranslationResponse]] = [None] * len(requests)
+        keys = [self._translation_key(request) for request in requests]
+        
+        # Serve phrasebook and cached items first and group the rest by language pair
+        groups = defaultdict(list)
+        for index, request in enumerate(requests):
+            results[index] = self._phrasebook_translation(request)
+            if results[index] is not None:
+                continue
+            cached_text = await self._get_cached_translation(keys[index])
+            if cached_text is not None:
+                results[index] = TranslationResponse(
+                    original_text=request.text,
+                    translated_text=cached_text,
+                    source_lang=request.source_lang,
+                    target_lang=request.target_lang,
+                    cached=True
+                )
+            else:
+                pair = (request.source_lang.strip().lower(), request.target_lang.strip().lower())
+                groups[pair].append(index)
+        
+        # Split each group into chunks whose prompt stays under the size cap and whose
+        # answer fits in the output token cap (with headroom, as it is an estimate);
+        # an answer cut off at the cap is not valid JSON
+        output_cap = max_output_tokens("translate")
+        output_budget = output_cap * 3 // 4 if output_cap else None
+        chunks = []
+        for indexes in groups.values():
+            chunk, chunk_chars, chunk_tokens = [], 0, 0
+            for index in indexes:
+                item_chars = len(requests[index].text) + len(requests[index].context or "")
+                item_tokens = batch_output_tokens(requests[index])
+                if chunk and (chunk_chars + item_chars > settings.translation_batch_max_chars
+                              or (output_budget and chunk_tokens + item_tokens > output_budget)):
+                    chunks.append(chunk)
+                    chunk, chunk_chars, chunk_tokens = [], 0, 0
+                chunk.append(index)
+                chunk_chars += item_chars
+                chunk_tokens += item_tokens
+            chunks.append(chunk)
+        
+        async def run_chunk(chunk: List[int]):
+            chunk_requests = [requests[index] for index in chunk]
+            for index, result in zip(chunk, await self._translate_chunk(chunk_requests, [keys[i] for i in chunk])):
+                results[index] = result
+        
+        await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+        return results
+    
+    async def _translate_chunk(
+        self,
+        requests: List[TranslationRequest],
+        keys: List[str]
+    ) -> List[TranslationResponse]:
+        """Translate items sharing a language pair with a single structured prompt
+        
+        If the answer is unusable, each half of the items is translated
+        again the same way, so a bad answer costs a few more calls rather
+        than one call per item at once.
+        """
+        
+        if len(requests) == 1:
+            return [await self._translate_with_model(requests[0])]
+        
+        source = LANG_NAMES.get(requests[0].source_lang, requests[0].source_lang)
+        target = LANG_NAMES.get(requests[0].target_lang, requests[0].target_lang)
+        items = [
+            {"id": number, "text": request.text, **({"context": request.context} if request.context else {})}
+            for number, request in enumerate(requests, start=1)
+        ]
+        
+        prompt = f"""Translate the "text" of each item below from {source} to {target}.
+Use an item's "context", if present, only to choose the right translation.
+Return only a JSON array of {len(requests)} strings containing the translations in the same order as the items, without any explanations or additional text.
+
+Items:
+{json.dumps(items, ensure_ascii=False)}"""
+        
+        try:
+            translations = parse_json_output(await self._generate(prompt, "translate"))
+            if (not isinstance(translations, list) or len(translations) != len(requests)
+                    or not all(isinstance(text, str) for text in translations)):
+                raise ValueError("unexpected batch translation output")
+        except (ValueError, TypeError) as e:
+            # json.JSONDecodeError is a ValueError
+            print(f"⚠️ Batch translation output unusable, splitting {len(requests)} items in two: {e}")
+            middle = len(requests) // 2
+            first, second = await asyncio.gather(
+                self._translate_chunk(requests[:middle], keys[:middle]),
+                self._translate_chunk(requests[middle:], keys[middle:])
+            )
+            return first + second
+        
+        responses = []
+        for request, key, translated_text in zip(requests, keys, translations):
+            translated_text = translated_text.strip()
+            await self._store_translation(key, translated_text)
+            responses.append(TranslationResponse(
+                original_text=request.text,
+                translated_text=translated_text,
+                source_lang=request.source_lang,
+                target_lang=request.target_lang
+            ))
+        return responses
+    
+    def load_guide_cache(self):
+        """Create the semantic /ai-guide cache and restore persisted answers
+        
+        Blocking (imports NumPy); run it off the event loop.
+        """
+        if settings.guide_cache_size <= 0 or self.guide_cache is not None:
+            return
+        from app.services.semantic_cache import SemanticCache
+        cache = SemanticCache(
+            maxsize=settings.guide_cache_size,
+            ttl=settings.guide_cache_ttl_seconds,
+            threshold=settings.guide_cache_threshold
+        )
+        if settings.guide_cache_path:
+            try:
+                self.guide_store = SQLiteCache(settings.guide_cache_path, ttl=settings.guide_cache_ttl_seconds)
+                for _, value, ttl in self.guide_store.items():
+                    entry = json.loads(value)
+                    cache.set(entry["partition"], entry["query"], AIGuideResponse(**entry["response"]), ttl=ttl)
+            except Exception as e:
+                print(f"⚠️ Guide cache file unavailable, using memory only: {e}")
+        self.guide_cache = cache
+    
+    def _guide_partition(self, request: AIGuideRequest) -> str:
+        """Semantic cache partition: only questions asked with the same options are compared
+        
+        The cache further splits it by the places and numbers named in the
+        question (see semantic_cache.exact_terms).
+        """
+        dates = request.trip_dates or {}
+        return make_key(
+            request.language.strip().lower(),
+            normalize_text(request.location).lower(),
+            dates.get("start"),
+            dates.get("end"),
+            sorted(normalize_text(preference).lower() for preference in request.preferences or [])
+        )
+    
+    async def _store_guide(self, partition: str, response: AIGuideResponse):
+        """Store an answer in the semantic cache and in the persistent tier"""
+        self.guide_cache.set(partition, response.query, response)
+        if self.guide_store:
+            entry = json.dumps({
+                "partition": partition,
+                "query": response.query,
+                "response": response.model_dump(mode="json")
+            }, ensure_ascii=False)
+            try:
+                await asyncio.to_thread(
+                    self.guide_store.set, make_key(partition, normalize_text(response.query)), entry
+                )
+            except Exception as e:
+                print(f"⚠️ Guide cache write error: {e}")
+    
+    def guide_cache_stats(self) -> Optional[dict]:
+        """Hit/miss counters for the semantic guide cache, or None until it is loaded"""
+        return self.guide_cache.stats() if self.guide_cache else None
+    
+    def _build_guide_prompt(self, request: AIGuideRequest) -> str:
+        """Build the travel guide prompt for a request"""
         
         lang_instruction = "Respond in Korean." if request.language == "ko" else "Respond in English."
         
@@ -82,19 +625,47 @@ Provide a helpful, detailed response that includes:
 4. Family-friendly suggestions when relevant
 
 Keep the tone warm, informative, and encouraging."""
+        return prompt
+    
+    async def get_travel_guide(self, request: AIGuideRequest, operation: str = "guide") -> AIGuideResponse:
+        """Get AI-powered travel guide recommendations
         
-        response = self.model.generate_content(prompt)
-        guide_text = response.text.strip()
+        Near-duplicate questions are answered from the semantic cache.
+        Background jobs pass operation="guide_job" for their own queue priority and limits.
+        """
+        partition = self._guide_partition(request)
+        if self.guide_cache is not None:
+            found = self.guide_cache.get(partition, request.query)
+            if found is not None:
+                answer, _ = found
+                return answer.model_copy(update={"query": request.query, "cached": True})
+        
+        guide_text = await self._generate(self._build_guide_prompt(request), operation)
         
         # For now, return a simple response
         # In the future, we can parse the response to extract structured recommendations
-        return AIGuideResponse(
+        response = AIGuideResponse(
             query=request.query,
             response=guide_text,
             recommendations=[],
             language=request.language,
             generated_at=datetime.utcnow()
         )
+        if self.guide_cache is not None:
+            await self._store_guide(partition, response)
+        return response
+    
+    def stream_travel_guide(self, request: AIGuideRequest) -> AsyncIterator[str]:
+        """Stream the travel guide answer as text chunks while Gemini generates it"""
+        return self._generate_stream(self._build_guide_prompt(request), "guide")
+    
+    def _recommendation_key(self, category: str, location: str, language: str) -> str:
+        """Cache key for a (category, location, language) recommendation lookup"""
+        return make_key(
+            normalize_text(category).lower(),
+            normalize_text(location).lower(),
+            language.strip().lower()
+        )
     
     async def get_recommendations(
         self,
@@ -103,6 +674,49 @@ Keep the tone warm, informative, and encouraging."""
         language: str = "en"
     ) -> List[Recommendation]:
         """Get specific recommendations for a category and location"""
+        recommendations, _ = await self.get_recommendations_with_age(category, location, language)
+        return recommendations
+    
+    async def get_recommendations_with_age(
+        self,
+        category: str,
+        location: str,
+        language: str = "en"
+    ) -> Tuple[List[Recommendation], float]:
+        """Get recommendations and their age in seconds (0 when just generated)
+        
+        Served from cache while fresh. Stale entries are still served, and
+        refreshed in the background (stale-while-revalidate).
+        """
+        key = self._recommendation_key(category, location, language)
+        found = self.recommendation_cache.get_with_age(key)
+        if found is not None:
+            recommendations, age = found
+            if age >= settings.recommendation_cache_ttl_seconds and key not in self._refreshing:
+                self._refreshing.add(key)
+                self._spawn(self._refresh_recommendations(key, category, location, language))
+            return recommendations, age
+        
+        return await self._fetch_recommendations(key, category, location, language), 0.0
+    
+    async def _refresh_recommendations(self, key: str, category: str, location: str, language: str):
+        """Refresh a stale recommendation cache entry"""
+        try:
+            await self._fetch_recommendations(key, category, location, language, "background")
+        except Exception as e:
+            print(f"⚠️ Recommendation refresh failed for {category}/{location}: {e}")
+        finally:
+            self._refreshing.discard(key)
+    
+    async def _fetch_recommendations(
+        self,
+        key: str,
+        category: str,
+        location: str,
+        language: str,
+        operation: str = "recommendations"
+    ) -> List[Recommendation]:
+        """Ask Gemini for recommendations as JSON, parse and cache them"""
         
         lang_instruction = "Respond in Korean." if language == "ko" else "Respond in English."
         
@@ -110,20 +724,129 @@ Keep the tone warm, informative, and encouraging."""
 
 Provide 5 top recommendations for {category} in {location}, Korea.
 
-For each recommendation, provide:
-1. Name/Title
-2. Brief description (2-3 sentences)
-3. Location/Address
-4. Estimated cost range
-5. 2-3 practical tips
-
-Format your response as a numbered list with clear sections."""
+Return only a JSON array of 5 objects, without any explanations or Markdown. Each object must have these keys:
+- "title": name of the place or activity
+- "description": brief description (2-3 sentences)
+- "location": location or address
+- "estimated_cost": estimated cost range
+- "tips": array of 2-3 practical tips"""
+        
+        items = parse_json_output(await self._generate(prompt, operation))
+        if not isinstance(items, list):
+            raise ValueError("Recommendations output is not a JSON array")
         
-        response = self.model.generate_content(prompt)
+        recommendations = []
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            try:
+                recommendations.append(Recommendation(**{**item, "category": category}))
+            except ValueError:
+                # Skip malformed items rather than failing the whole list
+                continue
+        
+        if recommendations:
+            self.recommendation_cache.set(key, recommendations)
+        return recommendations
+    
+    async def warm_recommendations(self):
+        """Pre-populate the recommendation cache for popular destinations"""
+        lookups = [
+            (category, location, language)
+            for location in settings.recommendation_warmup_locations_list
+            for category in settings.recommendation_warmup_categories_list
+            for language in settings.recommendation_warmup_languages_list
+        ]
+        
+        async def warm(category: str, location: str, language: str) -> bool:
+            key = self._recommendation_key(category, location, language)
+            if self.recommendation_cache.get(key) is not None:
+                return True
+            try:
+                await self._fetch_recommendations(key, category, location, language, "background")
+                return True
+            except Exception as e:
+                print(f"⚠️ Recommendation warm-up failed for {category}/{location}: {e}")
+                return False
+        
+        results = await asyncio.gather(*(warm(*lookup) for lookup in lookups))
+        print(f"🔥 Recommendation cache warmed: {sum(results)}/{len(lookups)}")
+    
+    def _spawn(self, coro):
+        """Run a coroutine in the background, keeping a reference until it finishes"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+
+class TranslationSession:
+    """A live conversation translated through one Gemini chat
+    
+    The chat history is a short instruction followed by the most recent
+    utterances and their translations, capped at
+    translation_session_context_chars, so each utterance sends a bounded
+    context rather than a full translation prompt. The history is rebuilt from
+    completed turns before every utterance, so a failed or abandoned turn
+    never leaves it inconsistent. Utterances must be translated one at a time.
+    """
+    
+    def __init__(self, service: GeminiService, source_lang: str, target_lang: str, context: Optional[str] = None):
+        self.service = service
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+        source = LANG_NAMES.get(source_lang, source_lang)
+        target = LANG_NAMES.get(target_lang, target_lang)
+        if source_lang == "auto":
+            instruction = f"Translate each message I send into {target}."
+        else:
+            # A conversation goes both ways
+            instruction = (
+                f"Interpret a conversation between a {source} speaker and a {target} speaker. "
+                f"Translate each message I send from {source} to {target}, or from {target} to {source}."
+            )
+        instruction += " Reply with only the translation, without any explanations or additional text."
+        if context:
+            instruction += f"\nContext: {context}"
+        self._instruction = instruction
+        self.choice = choose_model("translate", instruction)
+        self._chat: Any = None
+        self._turns: deque = deque()
+        self._context_chars = 0
+    
+    def _history(self) -> List[Dict[str, Any]]:
+        history = [
+            {"role": "user", "parts": [self._instruction]},
+            {"role": "model", "parts": ["OK"]},
+        ]
+        for utterance, translation in self._turns:
+            history.append({"role": "user", "parts": [utterance]})
+            history.append({"role": "model", "parts": [translation]})
+        return history
+    
+    async def translate(self, text: str) -> AsyncIterator[str]:
+        """Translate one utterance, yielding the translation in chunks as it is generated"""
+        await self.service.ensure_loaded()
+        if self._chat is None:
+            self._chat = self.service.model_for(self.choice.model).start_chat()
+        history = self._history()
+        self._chat.history = history
+        prompt = "\n".join([*(message["parts"][0] for message in history), text])
+        start = partial(self._chat.send_message_async, text, generation_config=self.choice.generation_config, stream=True)
         
-        # For now, return empty list
-        # TODO: Parse the response and create structured Recommendation objects
-        return []
+        chunks = []
+        async for chunk in self.service._stream("translate", prompt, self.choice, start):
+            chunks.append(chunk)
+            yield chunk
+        self._remember(text, "".join(chunks).strip())
+    
+    def _remember(self, utterance: str, translation: str):
+        """Add a completed turn, dropping the oldest ones beyond the context cap"""
+        self._turns.append((utterance, translation))
+        self._context_chars += len(utterance) + len(translation)
+        while self._turns and self._context_chars > settings.translation_session_context_chars:
+            utterance, translation = self._turns.popleft()
+            self._context_chars -= len(utterance) + len(translation)
 
 
 # Global Gemini service instance
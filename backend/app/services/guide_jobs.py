@@ -0,0 +1,203 @@
+"""Background /ai-guide jobs: a bounded queue, in-process workers and a persistent job store
+
+Jobs are stored in Firestore (the guide_jobs collection), so any worker
+process can answer polls and results outlive the process; without Firebase
+they are kept in memory only. Subscribers waiting on a job run by this
+process are woken on each status change.
+"""
+
+from typing import Optional, Dict, List, Any, Tuple
+from datetime import datetime, timedelta
+import asyncio
+import uuid
+
+from app.config import settings
+from app.metrics import GUIDE_JOB_LATENCY, GUIDE_JOB_WAIT
+from app.models.ai_guide import AIGuideJobRequest, AIGuideResponse
+from app.services.cache import TTLCache
+from app.services.firebase_service import firebase_service
+from app.services.gemini_service import gemini_service
+from app.services.resilience import CircuitOpenError
+from app.services.scheduler import RateLimitExceeded
+
+FINISHED = {"succeeded", "failed"}
+# Seconds between job store reads while waiting on a job run by another process
+STORE_POLL_SECONDS = 2.0
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is full"""
+
+
+class GuideJobQueue:
+    """Bounded queue of guide jobs drained by a fixed number of worker tasks"""
+
+    def __init__(self, workers: int, max_queue: int, ttl: float):
+        self.workers = workers
+        self.ttl = ttl
+        self._queue: "asyncio.Queue[Tuple[Dict[str, Any], AIGuideJobRequest]]" = asyncio.Queue(maxsize=max_queue)
+        # Jobs submitted to this process by ID (the only copy when Firebase is unavailable)
+        self._jobs = TTLCache(maxsize=max(1024, max_queue * 4), ttl=ttl)
+        self._running: Dict[str, Dict[str, Any]] = {}
+        # Set on the next status change of a local job, for waiting subscribers
+        self._changed: Dict[str, asyncio.Event] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        """Start the worker tasks (call from the running event loop)"""
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Stop the workers and mark unfinished jobs failed, so pollers don't wait on them forever"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        unfinished = list(self._running.values())
+        while not self._queue.empty():
+            job, _ = self._queue.get_nowait()
+            unfinished.append(job)
+        await asyncio.gather(*(
+            self._update(job, status="failed", error="Server shut down before the job finished",
+                         finished_at=datetime.utcnow())
+            for job in unfinished if job["status"] not in FINISHED
+        ))
+
+    async def submit(self, request: AIGuideJobRequest, user_id: Optional[str] = None) -> Dict[str, Any]:
+        """Store and queue a new job, returning it; raises JobQueueFull"""
+        if self._queue.full():
+            raise JobQueueFull("AI guide job queue is full, try again later")
+
+        now = datetime.utcnow()
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": "queued",
+            "request": request.model_dump(),
+            "user_id": user_id,
+            "result": None,
+            "error": None,
+            "trip_saved": None,
+            "created_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "expires_at": now + timedelta(seconds=self.ttl),
+        }
+        self._jobs.set(job["id"], job)
+        if firebase_service.is_initialized:
+            try:
+                await firebase_service.create_guide_job(job["id"], {k: v for k, v in job.items() if k != "id"})
+            except Exception as e:
+                print(f"⚠️ Guide job store write error, keeping {job['id']} in memory: {e}")
+
+        try:
+            self._queue.put_nowait((job, request))
+        except asyncio.QueueFull:
+            # Filled up while the job was being stored
+            await self._update(job, status="failed", error="Job queue full", finished_at=datetime.utcnow())
+            raise JobQueueFull("AI guide job queue is full, try again later")
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """A job by ID: local jobs from memory, others from the job store (None if unknown or expired)"""
+        job = self._jobs.get(job_id)
+        if job is not None or not firebase_service.is_initialized:
+            return job
+        job = await firebase_service.get_guide_job(job_id)
+        # Firestore TTL policies delete expired documents lazily
+        expires_at = job and job.get("expires_at")
+        if expires_at and expires_at.replace(tzinfo=None) <= datetime.utcnow():
+            return None
+        return job
+
+    async def wait(self, job_id: str, status: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """The job once its status is no longer `status`, or as it is when the timeout passes"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            local = self._jobs.get(job_id)
+            job = local if local is not None else await self.get(job_id)
+            remaining = deadline - loop.time()
+            if job is None or job["status"] != status or remaining <= 0:
+                return job
+            if local is not None:
+                changed = self._changed.setdefault(job_id, asyncio.Event())
+                try:
+                    await asyncio.wait_for(changed.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(min(STORE_POLL_SECONDS, remaining))
+
+    async def _work(self):
+        while True:
+            job, request = await self._queue.get()
+            try:
+                await self._run(job, request)
+            except Exception as e:
+                print(f"❌ Guide job {job['id']} crashed: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Dict[str, Any], request: AIGuideJobRequest):
+        started = datetime.utcnow()
+        GUIDE_JOB_WAIT.observe((started - job["created_at"]).total_seconds())
+        self._running[job["id"]] = job
+        await self._update(job, status="running", started_at=started)
+
+        changes: Dict[str, Any] = {"status": "failed"}
+        try:
+            result = await gemini_service.get_travel_guide(request, operation="guide_job")
+            changes = {"status": "succeeded", "result": result.model_dump()}
+            if request.trip_id:
+                changes["trip_saved"] = await self._save_to_trip(request.trip_id, result)
+        except asyncio.TimeoutError:
+            changes["error"] = "AI guide timed out"
+        except (RateLimitExceeded, CircuitOpenError) as e:
+            changes["error"] = str(e)
+        except Exception as e:
+            changes["error"] = f"AI guide error: {str(e)}"
+
+        finished = datetime.utcnow()
+        GUIDE_JOB_LATENCY.labels(changes["status"]).observe((finished - job["created_at"]).total_seconds())
+        await self._update(job, finished_at=finished, **changes)
+        del self._running[job["id"]]
+
+    async def _save_to_trip(self, trip_id: str, result: AIGuideResponse) -> bool:
+        """Save a job's answer on its trip; the job still succeeds if this fails"""
+        try:
+            await firebase_service.update_trip(trip_id, {"ai_guide": result.model_dump()})
+            return True
+        except Exception as e:
+            print(f"⚠️ Could not save guide job result on trip {trip_id}: {e}")
+            return False
+
+    async def _update(self, job: Dict[str, Any], **changes: Any):
+        """Apply a status change, wake its subscribers and write it to the job store"""
+        job.update(changes)
+        self._jobs.set(job["id"], job)
+        changed = self._changed.pop(job["id"], None)
+        if changed is not None:
+            changed.set()
+        if firebase_service.is_initialized:
+            try:
+                await firebase_service.update_guide_job(job["id"], changes)
+            except Exception as e:
+                print(f"⚠️ Guide job store write error for {job['id']}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and worker usage"""
+        return {
+            "queued": self._queue.qsize(),
+            "running": len(self._running),
+            "workers": self.workers,
+            "max_queue": self._queue.maxsize,
+        }
+
+
+# Global background guide job queue
+guide_jobs = GuideJobQueue(
+    workers=settings.guide_job_workers,
+    max_queue=settings.guide_job_max_queue,
+    ttl=settings.guide_job_ttl_seconds
+)
@@ -0,0 +1,77 @@
+"""Size-aware routing of Gemini calls to model tiers"""
+
+from pydantic import BaseModel
+from contextvars import ContextVar
+from typing import Any, Dict, NamedTuple, Optional, Set
+import math
+import re
+
+from app.config import settings
+
+# Hangul (syllables and jamo), kana, CJK ideographs and other wide characters
+WIDE_CHARS = re.compile(r"[\u1100-\u11ff\u2e80-\U0010ffff]")
+
+# Models chosen while handling the current request (see track_models)
+_models_used: ContextVar[Optional[Set[str]]] = ContextVar("gemini_models_used", default=None)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough Gemini token count computed locally (no countTokens round trip)
+
+    Latin-script text averages about four characters per token, while
+    Korean, Japanese and Chinese come close to one token per character.
+    """
+    wide = len(WIDE_CHARS.findall(text))
+    return wide + math.ceil((len(text) - wide) / 4)
+
+
+class ModelRoute(BaseModel):
+    """Routing and generation settings for one operation"""
+    light_max_prompt_tokens: int = 0  # Prompts up to this size go to the light model (0 = never)
+    max_output_tokens: Optional[int] = None
+    temperature: Optional[float] = None
+
+    def generation_config(self) -> Dict[str, Any]:
+        return {
+            name: value
+            for name, value in (("max_output_tokens", self.max_output_tokens), ("temperature", self.temperature))
+            if value is not None
+        }
+
+
+class ModelChoice(NamedTuple):
+    model: str
+    prompt_tokens: int
+    generation_config: Dict[str, Any]
+
+
+def choose_model(operation: str, prompt: str) -> ModelChoice:
+    """Pick the model tier and generation config for a prompt"""
+    route = ModelRoute(**settings.gemini_model_routes.get(operation, {}))
+    tokens = estimate_tokens(prompt)
+    light = bool(settings.gemini_light_model) and tokens <= route.light_max_prompt_tokens
+    model = settings.gemini_light_model if light else settings.gemini_model
+    return ModelChoice(model, tokens, route.generation_config())
+
+
+def max_output_tokens(operation: str) -> Optional[int]:
+    """The output token cap of an operation's calls, if it has one"""
+    return ModelRoute(**settings.gemini_model_routes.get(operation, {})).max_output_tokens
+
+
+def track_models() -> Set[str]:
+    """Start collecting the models used by Gemini calls made from the current request"""
+    used: Set[str] = set()
+    _models_used.set(used)
+    return used
+
+
+def note_model(model: str):
+    used = _models_used.get()
+    if used is not None:
+        used.add(model)
+
+
+def model_headers(used: Set[str]) -> Dict[str, str]:
+    """X-Gemini-Model response header (omitted when no model was called, e.g. cache hits)"""
+    return {"X-Gemini-Model": ", ".join(sorted(used))} if used else {}
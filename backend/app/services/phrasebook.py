@@ -0,0 +1,243 @@
+"""Local phrasebook answering common travel phrases and signs without calling Gemini"""
+
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import re
+import unicodedata
+
+BUNDLED_PATH = Path(__file__).resolve().parent.parent / "data" / "phrasebook.tsv"
+
+# Typos are only tolerated in scripts with sub-word letters (Hangul is compared
+# jamo by jamo); one character of Japanese or Chinese can change the meaning
+FUZZY_LANGS = {"en", "ko"}
+
+_CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONGSEONG = "ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ"
+
+
+def _jamo_table() -> Dict[int, str]:
+    """Map Hangul syllables and conjoining jamo to compatibility jamo letters"""
+    table = {}
+    for index, letter in enumerate(_CHOSEONG):
+        table[0x1100 + index] = letter
+    for index, letter in enumerate(_JUNGSEONG):
+        table[0x1161 + index] = letter
+    for index, letter in enumerate(_JONGSEONG):
+        table[0x11A8 + index] = letter
+    for index in range(11172):
+        initial, rest = divmod(index, 588)
+        medial, final = divmod(rest, 28)
+        table[0xAC00 + index] = _CHOSEONG[initial] + _JUNGSEONG[medial] + (_JONGSEONG[final - 1] if final else "")
+    return table
+
+
+JAMO_TABLE = _jamo_table()
+NON_WORD = re.compile(r"[\W_]+")
+
+# A near match that adds or drops a negation means the opposite ("I can eat
+# spicy food" is one edit from "I can't eat..."), so negation must agree
+NEGATION = {
+    "en": re.compile(
+        r"\b(?:not|no|never|cannot|(?:ca|do|does|did|is|are|was|were|have|has|had|wo|could|should|would|must)n['’]?t)\b"
+    ),
+    "ko": re.compile(r"(?:^|\s)[안못](?:\s|$)|[못않없]|아니|금지|말[고아라]|마세요|마십시오"),
+}
+# Korean particles are often dropped in speech ("화장실 어디예요?"), so keys
+# are also indexed with the particle ending each word removed
+PARTICLES = {
+    "ko": ("에서", "으로", "이", "가", "을", "를", "은", "는", "도", "에", "로", "의"),
+}
+
+
+def normalize_phrase(text: str) -> str:
+    """Matching key: case, width, spacing and punctuation removed, Hangul spelled out in jamo
+
+    "화장실이 어디예요?", "화장실이어디예요" and text typed as separate jamo
+    all give the same key.
+    """
+    text = unicodedata.normalize("NFKC", text).casefold().translate(JAMO_TABLE)
+    return NON_WORD.sub("", text)
+
+
+def is_negated(text: str, lang: str) -> bool:
+    """Whether a phrase in this language contains a negation word"""
+    pattern = NEGATION.get(lang)
+    return bool(pattern and pattern.search(unicodedata.normalize("NFKC", text).casefold()))
+
+
+def strip_particles(text: str, lang: str) -> str:
+    """Text with the particle ending each word removed (unchanged for languages without particles)"""
+    particles = PARTICLES.get(lang)
+    if not particles:
+        return text
+    words = []
+    for word in NON_WORD.sub(" ", unicodedata.normalize("NFKC", text)).split():
+        for particle in particles:
+            if word.endswith(particle) and len(word) > len(particle):
+                word = word[:-len(particle)]
+                break
+        words.append(word)
+    return " ".join(words)
+
+
+def _trigrams(key: str) -> List[str]:
+    return [key[i:i + 3] for i in range(len(key) - 2)]
+
+
+def max_edits(key: str) -> int:
+    """Edits tolerated for a key of this length (short keys must match exactly)"""
+    if len(key) < 8:
+        return 0
+    return 1 if len(key) < 20 else 2
+
+
+def edit_distance(a: str, b: str, limit: int) -> Optional[int]:
+    """Levenshtein distance, or None once it is known to exceed the limit
+
+    Only the diagonal band of width `limit` is computed; paths leaving it
+    cost more than the limit anyway.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return None
+    over = limit + 1
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        low, high = max(1, i - limit), min(len(b), i + limit)
+        current = [over] * (len(b) + 1)
+        current[0] = i if i <= limit else over
+        char_a = a[i - 1]
+        for j in range(low, high + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != b[j - 1]))
+        if min(current[low - 1:high + 1]) > limit:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= limit else None
+
+
+class Phrasebook:
+    """Phrase translations indexed by normalized key, per source language
+
+    Exact lookups are a dict hit on the normalized key, then (in languages
+    with particles) on the key without particles. Misses in FUZZY_LANGS fall
+    back to a trigram index: candidates sharing enough trigrams with the
+    query and agreeing with it on negation are checked with a bounded edit
+    distance, and only an unambiguous closest match is returned.
+    """
+
+    def __init__(self):
+        self.languages: List[str] = []
+        self.rows: List[Dict[str, str]] = []
+        self._exact: Dict[str, Dict[str, int]] = {}
+        self._bare: Dict[str, Dict[str, int]] = {}
+        self._keys: Dict[str, List[Tuple[str, int, bool]]] = {}
+        self._trigrams: Dict[str, Dict[str, List[int]]] = {}
+        self._longest: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def load(self, path: Path = BUNDLED_PATH):
+        """Load a tab-separated file: a header of language codes, then one phrase per line"""
+        with open(path, encoding="utf-8") as f:
+            lines = [line.rstrip("\n") for line in f if line.strip() and not line.startswith("#")]
+        if not lines:
+            raise ValueError(f"Phrasebook {path} is empty")
+
+        languages = lines[0].split("\t")
+        rows = []
+        for number, line in enumerate(lines[1:], start=2):
+            cells = line.split("\t")
+            if len(cells) != len(languages):
+                raise ValueError(f"Phrasebook {path}: expected {len(languages)} columns in entry {number}")
+            rows.append({lang: text.strip() for lang, text in zip(languages, cells) if text.strip()})
+
+        exact: Dict[str, Dict[str, int]] = {lang: {} for lang in languages}
+        bare: Dict[str, Dict[str, int]] = {lang: {} for lang in languages if lang in PARTICLES}
+        keys: Dict[str, List[Tuple[str, int, bool]]] = {lang: [] for lang in languages}
+        trigrams: Dict[str, Dict[str, List[int]]] = {lang: defaultdict(list) for lang in languages}
+        for row_index, row in enumerate(rows):
+            for lang, text in row.items():
+                key = normalize_phrase(text)
+                # The first entry wins when two phrases normalize the same
+                if not key or key in exact[lang]:
+                    continue
+                exact[lang][key] = row_index
+                if lang in bare:
+                    bare[lang].setdefault(normalize_phrase(strip_particles(text, lang)), row_index)
+                if lang in FUZZY_LANGS:
+                    for gram in set(_trigrams(key)):
+                        trigrams[lang][gram].append(len(keys[lang]))
+                    keys[lang].append((key, row_index, is_negated(text, lang)))
+
+        self.languages, self.rows = languages, rows
+        self._exact, self._bare, self._keys, self._trigrams = exact, bare, keys, trigrams
+        self._longest = {lang: max((len(key) for key, _, _ in keys[lang]), default=0) for lang in languages}
+
+    def _fuzzy(self, lang: str, key: str, negated: bool) -> Optional[Tuple[int, int]]:
+        """Closest (distance, row) within the edit limit, if exactly one row is closest
+
+        Only phrases that are negated exactly when the query is are considered.
+        """
+        limit = max_edits(key)
+        postings = self._trigrams.get(lang)
+        # Sentences longer than every phrase (most misses) skip the index
+        if not limit or not postings or len(key) > self._longest[lang] + limit:
+            return None
+        grams = _trigrams(key)
+        shared = Counter(index for gram in set(grams) for index in postings.get(gram, ()))
+        # Each edit breaks at most three trigrams
+        needed = len(grams) - 3 * limit
+
+        best: Optional[Tuple[int, int]] = None
+        tied = False
+        for index, count in shared.items():
+            if count < needed:
+                continue
+            candidate, row_index, candidate_negated = self._keys[lang][index]
+            if candidate_negated != negated:
+                continue
+            distance = edit_distance(key, candidate, limit)
+            if distance is None:
+                continue
+            if best is None or distance < best[0]:
+                best, tied = (distance, row_index), False
+            elif distance == best[0] and row_index != best[1]:
+                tied = True
+        return None if tied else best
+
+    def lookup(self, text: str, source_lang: str, target_lang: str) -> Optional[Tuple[str, bool]]:
+        """Translation of a known phrase and whether it was an inexact match, or None
+
+        `source_lang` may be "auto", in which case every language is searched.
+        """
+        target_lang = target_lang.strip().lower()
+        source_lang = source_lang.strip().lower()
+        if target_lang not in self._exact:
+            return None
+        sources = self.languages if source_lang == "auto" else [source_lang]
+        key = normalize_phrase(text)
+        if not key:
+            return None
+
+        for lang in sources:
+            row_index = self._exact.get(lang, {}).get(key)
+            if row_index is not None and target_lang in self.rows[row_index]:
+                return self.rows[row_index][target_lang], False
+
+        for lang in sources:
+            if lang in self._bare:
+                row_index = self._bare[lang].get(normalize_phrase(strip_particles(text, lang)))
+                if row_index is not None and target_lang in self.rows[row_index]:
+                    return self.rows[row_index][target_lang], True
+
+        best: Optional[Tuple[int, int]] = None
+        for lang in sources:
+            if lang in FUZZY_LANGS:
+                match = self._fuzzy(lang, key, is_negated(text, lang))
+                if match is not None and (best is None or match[0] < best[0]):
+                    best = match
+        if best is not None and target_lang in self.rows[best[1]]:
+            return self.rows[best[1]][target_lang], True
+        return None
@@ -0,0 +1,191 @@
+"""Deadlines, retries, hedging and circuit breaking for upstream calls"""
+
+from pydantic import BaseModel
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+import asyncio
+import random
+import time
+
+from app.services.scheduler import RateLimitExceeded
+
+T = TypeVar("T")
+
+# HTTP status of retryable google.api_core errors (throttling and upstream 5xx).
+# Matched on the `code` attribute so the slow-to-import SDK isn't needed here.
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Timeouts, connection errors, throttling and upstream 5xx are worth retrying"""
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    return getattr(error, "code", None) in RETRYABLE_STATUS
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling upstream while the circuit breaker is open"""
+
+
+class CallPolicy(BaseModel):
+    """Resilience settings for one operation"""
+    timeout: float = 60.0  # Deadline per attempt, in seconds
+    retries: int = 2  # Extra attempts after a retryable error
+    backoff_base: float = 0.5  # Backoff before retry n is random in [0, base * 2**n]
+    backoff_max: float = 8.0
+    hedge: bool = False  # Send a second request when the first is slow
+    hedge_quantile: float = 0.95  # ...after this latency quantile of recent calls
+    hedge_min_delay: float = 0.5
+    hedge_min_samples: int = 20  # Don't hedge until there is enough latency history
+
+
+class LatencyTracker:
+    """Rolling window of recent successful call latencies"""
+
+    def __init__(self, size: int = 200):
+        self._samples: deque = deque(maxlen=size)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def quantile(self, q: float) -> float:
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitBreaker:
+    """Fails fast after repeated upstream failures
+
+    Opens after `failure_threshold` consecutive failures. After
+    `reset_timeout` seconds one probe call is let through (half-open); its
+    success closes the circuit and its failure opens it again. A probe that
+    never reports back (e.g. it was cancelled) is replaced after another
+    `reset_timeout`.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "half_open":
+            # Let this call probe; everyone else keeps failing fast meanwhile
+            self.opened_at = time.monotonic()
+            return True
+        return state == "closed"
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, object]:
+        return {"state": self.state, "consecutive_failures": self.failures}
+
+
+async def call_with_resilience(
+    attempt: Callable[[], Awaitable[T]],
+    policy: CallPolicy,
+    breaker: CircuitBreaker,
+    latency: LatencyTracker,
+    admit: Optional[Callable[[], Awaitable[object]]] = None
+) -> T:
+    """Run `attempt` with a per-attempt deadline, jittered retries, optional hedging and a circuit breaker
+    
+    `admit` (e.g. waiting for a rate limit token) runs before every attempt
+    and hedge, outside the deadline: time queued behind our own limiter is
+    not upstream latency, and a RateLimitExceeded from it is raised as is,
+    without counting as a breaker failure or being retried.
+    """
+    for retry in range(policy.retries + 1):
+        if not breaker.allow():
+            raise CircuitOpenError("Gemini is temporarily unavailable")
+        try:
+            result = await _hedged(attempt, policy, latency, admit)
+        except Exception as e:
+            if not is_retryable(e):
+                if isinstance(getattr(e, "code", None), int):
+                    # Upstream answered, just not with a result (e.g. invalid request)
+                    breaker.record_success()
+                raise
+            breaker.record_failure()
+            if retry == policy.retries:
+                raise
+            backoff = random.uniform(0, min(policy.backoff_max, policy.backoff_base * 2 ** retry))
+            print(f"⚠️ Gemini call failed ({type(e).__name__}), retrying in {backoff:.2f}s")
+            await asyncio.sleep(backoff)
+            continue
+        breaker.record_success()
+        return result
+
+
+async def _timed(
+    attempt: Callable[[], Awaitable[T]],
+    policy: CallPolicy,
+    latency: LatencyTracker,
+    admit: Optional[Callable[[], Awaitable[object]]] = None
+) -> T:
+    """One attempt, admitted first, then run under the policy deadline, recording its latency on success"""
+    if admit is not None:
+        await admit()
+    started = time.monotonic()
+    result = await asyncio.wait_for(attempt(), timeout=policy.timeout)
+    latency.record(time.monotonic() - started)
+    return result
+
+
+async def _hedged(
+    attempt: Callable[[], Awaitable[T]],
+    policy: CallPolicy,
+    latency: LatencyTracker,
+    admit: Optional[Callable[[], Awaitable[object]]] = None
+) -> T:
+    """Run an attempt; if hedging is on and it is slower than usual, race a duplicate"""
+    if not policy.hedge or len(latency) < policy.hedge_min_samples:
+        return await _timed(attempt, policy, latency, admit)
+
+    # The hedge delay counts from when the first request is actually sent
+    if admit is not None:
+        await admit()
+    delay = max(policy.hedge_min_delay, latency.quantile(policy.hedge_quantile))
+    pending = {asyncio.ensure_future(_timed(attempt, policy, latency))}
+    try:
+        done, pending = await asyncio.wait(pending, timeout=delay)
+        if not done:
+            pending.add(asyncio.ensure_future(_timed(attempt, policy, latency, admit)))
+
+        error: Optional[BaseException] = None
+        while True:
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                # A hedge that was never admitted says nothing about upstream
+                if error is None or isinstance(error, RateLimitExceeded):
+                    error = task.exception()
+            if not pending:
+                raise error
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        # Cancelling the losing request ends its upstream call and frees its concurrency slot
+        for task in pending:
+            task.cancel()
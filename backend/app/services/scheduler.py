@@ -0,0 +1,128 @@
+"""Outbound rate limiting for the shared Gemini quota"""
+
+from typing import Optional, Dict, Any, List, Tuple
+import asyncio
+import heapq
+import itertools
+import time
+
+
+# Lower value = served first
+PRIORITIES = {
+    "translate": 0,
+    "recommendations": 1,
+    "guide": 2,
+    # Background /ai-guide jobs: nobody holds a connection open for them
+    "guide_job": 3,
+    # Cache warm-up and stale-while-revalidate refreshes
+    "background": 4,
+}
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call is rejected because the queue is full or its deadline passed"""
+
+
+class PriorityScheduler:
+    """Token-bucket limiter that admits queued calls in priority order
+
+    Tokens refill at `rate` per second up to `burst`. When no token is
+    available, callers wait in a priority queue; within a priority class
+    calls are served first come, first served. A caller that is not
+    admitted before its deadline, or arrives when the queue is full, gets
+    RateLimitExceeded. A rate of 0 disables limiting.
+    """
+
+    def __init__(self, rate: float, burst: int, max_queue: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_queue = max_queue
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        # (priority, sequence, operation, future)
+        self._queue: List[Tuple[int, int, str, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self.admitted = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, operation: str, deadline: Optional[float] = None) -> float:
+        """Wait for a token, returning the time spent queued in seconds"""
+        if self.rate <= 0:
+            return 0.0
+
+        self._refill()
+        if not self._queue and self._tokens >= 1:
+            self._tokens -= 1
+            self._admit(0.0)
+            return 0.0
+
+        if len(self._queue) >= self.max_queue:
+            self.rejected += 1
+            raise RateLimitExceeded("Gemini request queue is full")
+
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (PRIORITIES.get(operation, len(PRIORITIES)), next(self._sequence), operation, future))
+        self._schedule()
+        try:
+            await asyncio.wait_for(future, timeout=deadline)
+        except asyncio.TimeoutError:
+            # The cancelled future is skipped (and dropped) when it reaches the front
+            self.rejected += 1
+            raise RateLimitExceeded(f"Gemini quota wait exceeded {deadline}s")
+
+        waited = time.monotonic() - started
+        self._admit(waited)
+        return waited
+
+    def _admit(self, waited: float):
+        self.admitted += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+    def _schedule(self):
+        """Arrange for _dispatch to run when the next token is available"""
+        if self._wakeup is not None or not self._queue:
+            return
+        delay = max(0.0, (1 - self._tokens) / self.rate)
+        self._wakeup = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def _dispatch(self):
+        """Hand available tokens to the highest-priority waiters"""
+        self._wakeup = None
+        self._refill()
+        while self._queue and self._tokens >= 1:
+            _, _, _, future = heapq.heappop(self._queue)
+            if future.done():
+                continue
+            self._tokens -= 1
+            future.set_result(None)
+        # Drop waiters that gave up so they don't hold queue slots
+        while self._queue and self._queue[0][3].done():
+            heapq.heappop(self._queue)
+        self._schedule()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth per operation and wait time counters"""
+        depth: Dict[str, int] = {}
+        for _, _, operation, future in self._queue:
+            if not future.done():
+                depth[operation] = depth.get(operation, 0) + 1
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "queue_depth": sum(depth.values()),
+            "queue_depth_by_operation": depth,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "wait_avg": round(self.total_wait / self.admitted, 4) if self.admitted else 0.0,
+            "wait_max": round(self.max_wait, 4),
+        }
@@ -0,0 +1,294 @@
+"""Semantic cache matching near-duplicate questions by local embeddings
+
+Imports NumPy, so GeminiService only imports it when the cache is created
+in the background at startup.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import itertools
+import re
+import threading
+import time
+import unicodedata
+import zlib
+
+import numpy as np
+
+WORDS = re.compile(r"\w+")
+# Words that carry little meaning in travel questions
+STOPWORDS = frozenset(
+    "a an and are at best can do does for friendly from good how i in into is it me my of on or please "
+    "recommend some suggest the there to top we what when where which who with you your".split()
+)
+# Words marking the role of the next word ("from Seoul to Busan" is not "from Busan to Seoul")
+ROLE_WORDS = frozenset(("from", "to", "into", "toward", "towards"))
+# Korean particles split off the end of words ("명동에서" -> "명동"), longest first; they
+# mark the word's role like ROLE_WORDS do
+PARTICLES = ("에서", "으로", "에게", "까지", "부터", "하고", "이랑", "과", "와", "은", "는", "이", "가", "을", "를",
+             "의", "도", "로", "에", "랑")
+# Travel words with the same meaning share one feature ("food" / "restaurants", "kids" / "children")
+CONCEPTS = {
+    word: concept
+    for concept, words in {
+        "#food": "food eat eating dine dining meal restaurant 맛집 음식 식당 먹을 먹거리",
+        "#kids": "kid child children toddler baby family families 아이 아이들 어린이 아기 애들 가족",
+        "#stay": "hotel stay accommodation lodging 숙소 호텔 숙박",
+        "#sights": "attraction sight sightseeing landmark 관광지 명소 볼거리",
+        "#cheap": "cheap budget affordable inexpensive 저렴한 싼",
+        "#shopping": "shop shopping 쇼핑",
+        "#cafe": "cafe coffee 카페 커피",
+        "#go": "get go going travel route way 가는 가는법 방법 이동",
+    }.items()
+    for word in words.split()
+}
+# Places and numbers change the answer but are one word of a long question, too
+# little to move its embedding, so questions only match when they name the same ones
+PLACES = {
+    alias: aliases.split()[0]
+    for aliases in (
+        "seoul 서울", "busan pusan 부산", "jeju 제주 제주도", "incheon 인천", "gyeongju 경주", "jeonju 전주",
+        "daegu 대구", "daejeon 대전", "gwangju 광주", "ulsan 울산", "suwon 수원", "sokcho 속초",
+        "gangneung 강릉", "yeosu 여수", "tongyeong 통영", "andong 안동", "pohang 포항", "chuncheon 춘천",
+        "gapyeong 가평", "pyeongchang 평창", "seogwipo 서귀포", "myeongdong 명동", "gangnam 강남",
+        "hongdae 홍대", "itaewon 이태원", "insadong 인사동", "jongno 종로", "bukchon 북촌", "dongdaemun 동대문",
+        "namdaemun 남대문", "jamsil 잠실", "yeouido 여의도", "seongsu 성수", "haeundae 해운대",
+        "gwangalli 광안리", "nampo 남포", "gamcheon 감천",
+    )
+    for alias in aliases.split()
+}
+NUMBER_WORDS = {
+    word: str(value)
+    for value, words in enumerate((
+        "", "one first 하나 한 하루", "two second 둘 두 이틀", "three third 셋 세 사흘", "four fourth 넷 네 나흘",
+        "five fifth 다섯", "six sixth 여섯", "seven seventh 일곱", "eight eighth 여덟", "nine ninth 아홉",
+        "ten tenth 열", "eleven eleventh", "twelve twelfth",
+    ))
+    for word in words.split()
+}
+PLACE_NAMES = frozenset(PLACES.values())
+DIGITS = re.compile(r"\d+")
+# Negated questions ("... that are not spicy") never match ones without a negation
+NEGATION_WORDS = frozenset("not no non without never nor except excluding avoid 안 못".split())
+NEGATION_PARTS = ("없", "않", "말고", "빼고", "ない", "ません", "なし", "以外", "不", "没", "沒", "无", "無", "除了")
+
+# Feature weights: words and their roles dominate; ordered pairs of names separate
+# questions naming the same places in a different order; character n-grams catch typos
+WORD_WEIGHT = 1.0
+ROLE_WEIGHT = 1.0
+PAIR_WEIGHT = 1.0
+NGRAM_WEIGHT = 0.3
+
+
+def _tokens(text: str) -> List[Tuple[str, Optional[str]]]:
+    """Content words in order, with concepts, places and numbers normalized, and the role word or particle of each"""
+    text = unicodedata.normalize("NFKC", text).casefold().replace("n't", " not").replace("n’t", " not")
+    tokens: List[Tuple[str, Optional[str]]] = []
+    role: Optional[str] = None
+    for word in WORDS.findall(text):
+        if word in ROLE_WORDS:
+            role = word
+            continue
+        if word in STOPWORDS:
+            continue
+        particle = None
+        if word.isascii():
+            if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+                word = word[:-1]
+        else:
+            for candidate in PARTICLES:
+                if (word.endswith(candidate) and len(word) > len(candidate)
+                        and word not in CONCEPTS and word not in PLACES):
+                    word, particle = word[:-len(candidate)], candidate
+                    break
+        token = CONCEPTS.get(word) or PLACES.get(word) or NUMBER_WORDS.get(word, word)
+        # "가는 방법" is one concept, not two
+        if not tokens or tokens[-1][0] != token:
+            tokens.append((token, role or particle))
+        role = None
+    return tokens
+
+
+def is_negated(text: str) -> bool:
+    """Whether a question contains a negation ("not", "없는", "ない", "不" ...)"""
+    normalized = unicodedata.normalize("NFKC", text).casefold().replace("n't", " not").replace("n’t", " not")
+    return (any(word in NEGATION_WORDS for word in WORDS.findall(normalized))
+            or any(part in normalized for part in NEGATION_PARTS))
+
+
+def exact_terms(text: str) -> List[str]:
+    """Places and numbers in a question, normalized ("Busan" / "부산에서" -> "busan", "four" / "4" -> "4")"""
+    terms = set()
+    for token, _ in _tokens(text):
+        if token in PLACE_NAMES:
+            terms.add(token)
+        else:
+            terms.update(str(int(number)) for number in DIGITS.findall(token))
+    return sorted(terms)
+
+
+def embed(text: str, dimensions: int) -> np.ndarray:
+    """Unit-length hashed vector of words, their roles, ordered word pairs and character n-grams
+
+    No model and no network. Known travel words map to shared concepts, so
+    "best food in Myeongdong for kids" and "kid-friendly restaurants
+    Myeongdong" come out close. Roles ("from" / "to", Korean particles) and
+    ordered pairs of other words keep "Seoul to Busan" apart from "Busan to
+    Seoul". Trigrams of
+    each other word catch typos and inflections; non-Latin words also get
+    bigrams, as Korean, Japanese and Chinese words are short or not separated
+    by spaces. Features are hashed with CRC-32, which is stable across processes.
+    """
+    features: List[Tuple[str, float]] = []
+    previous: Optional[str] = None
+    for token, role in _tokens(text):
+        features.append((token, WORD_WEIGHT))
+        if role:
+            features.append((f"{role}>{token}", ROLE_WEIGHT))
+        if token.startswith("#"):
+            # Concepts can come in any order ("restaurants for kids" / "kid-friendly restaurants")
+            continue
+        if previous is not None:
+            features.append((f"{previous} {token}", PAIR_WEIGHT))
+        previous = token
+        padded = f"<{token}>"
+        features.extend((padded[i:i + 3], NGRAM_WEIGHT) for i in range(len(padded) - 2))
+        if not token.isascii():
+            features.extend((padded[i:i + 2], NGRAM_WEIGHT) for i in range(len(padded) - 1))
+
+    vector = np.zeros(dimensions, dtype=np.float32)
+    if not features:
+        return vector
+    hashes = np.fromiter((zlib.crc32(feature.encode("utf-8")) for feature, _ in features), dtype=np.uint32)
+    weights = np.fromiter((weight for _, weight in features), dtype=np.float32)
+    signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+    np.add.at(vector, hashes % dimensions, signs * weights)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class _Partition:
+    """Vectors of one partition as rows of a matrix, with their entries"""
+
+    def __init__(self, dimensions: int):
+        self.vectors = np.zeros((8, dimensions), dtype=np.float32)
+        self.ids: List[int] = []
+        # (expires_at, value) per row
+        self.entries: List[Tuple[float, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, entry_id: int, vector: np.ndarray, expires_at: float, value: Any):
+        size = len(self.ids)
+        if size == len(self.vectors):
+            grown = np.zeros((size * 2, self.vectors.shape[1]), dtype=np.float32)
+            grown[:size] = self.vectors
+            self.vectors = grown
+        self.vectors[size] = vector
+        self.ids.append(entry_id)
+        self.entries.append((expires_at, value))
+
+    def remove(self, entry_id: int):
+        """Remove a row by moving the last row into its place"""
+        row, last = self.ids.index(entry_id), len(self.ids) - 1
+        self.vectors[row] = self.vectors[last]
+        self.ids[row] = self.ids[last]
+        self.entries[row] = self.entries[last]
+        self.ids.pop()
+        self.entries.pop()
+
+    def nearest(self, vector: np.ndarray) -> Tuple[int, float]:
+        """Row with the highest cosine similarity (rows are unit length) and its score"""
+        scores = self.vectors[:len(self.ids)] @ vector
+        row = int(np.argmax(scores))
+        return row, float(scores[row])
+
+
+class SemanticCache:
+    """Bounded cache whose lookups return the most similar stored text above a threshold
+
+    Entries are grouped into partitions (only texts in the same partition are
+    compared; negated and plain questions, and questions naming different
+    places or numbers, are kept apart), and each lookup
+    is one matrix-vector product over its partition. The least recently used entry is evicted when full, and entries
+    expire after the TTL.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, threshold: float, dimensions: int = 512):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        self.dimensions = dimensions
+        self._partitions: Dict[str, _Partition] = {}
+        # entry id -> partition, least recently used first
+        self._lru: "OrderedDict[int, str]" = OrderedDict()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, partition: str, text: str) -> Optional[Tuple[Any, float]]:
+        """Get (value, similarity) of the closest live entry at or above the threshold, or None"""
+        partition = self._partition(partition, text)
+        vector = embed(text, self.dimensions)
+        now = time.time()
+        with self._lock:
+            rows = self._partitions.get(partition)
+            if rows:
+                row, score = rows.nearest(vector)
+                expires_at, value = rows.entries[row]
+                if score >= self.threshold:
+                    if expires_at > now:
+                        self._lru.move_to_end(rows.ids[row])
+                        self.hits += 1
+                        return value, score
+                    self._remove(rows.ids[row])
+            self.misses += 1
+            return None
+
+    def set(self, partition: str, text: str, value: Any, ttl: Optional[float] = None):
+        """Store a value under a text, evicting the least recently used entry when full"""
+        if self.maxsize <= 0:
+            return
+        partition = self._partition(partition, text)
+        vector = embed(text, self.dimensions)
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            entry_id = next(self._ids)
+            rows = self._partitions.get(partition)
+            if rows is None:
+                rows = self._partitions[partition] = _Partition(self.dimensions)
+            rows.add(entry_id, vector, expires_at, value)
+            self._lru[entry_id] = partition
+            while len(self._lru) > self.maxsize:
+                self._remove(next(iter(self._lru)))
+
+    @staticmethod
+    def _partition(partition: str, text: str) -> str:
+        terms = exact_terms(text)
+        if terms:
+            partition = f"{partition}\x1f{' '.join(terms)}"
+        return f"{partition}\x1fnot" if is_negated(text) else partition
+
+    def _remove(self, entry_id: int):
+        partition = self._lru.pop(entry_id)
+        rows = self._partitions[partition]
+        rows.remove(entry_id)
+        if not rows:
+            del self._partitions[partition]
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._lru),
+            "maxsize": self.maxsize,
+            "partitions": len(self._partitions),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,106 @@
+"""Cold start measurement: app import time and time to first request
+
+Run from backend/:
+
+    python -m benchmarks.coldstart --runs 5
+    python -m benchmarks.coldstart --real    # real SDKs (needs credentials in .env)
+
+Import time is measured in fresh interpreters. Time to first request spawns
+a server process and times it until /health answers (listening), until a
+translation answered by the phrasebook returns (no Gemini SDK needed), and
+until a translation that has to call Gemini returns (SDK loaded). By default the server runs against the local
+fakes (`benchmarks.loadtest --serve`), so no network is needed.
+"""
+
+from typing import Dict, List, Optional
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+# Answered by the local phrasebook, then one that isn't (made unique per run so no cache answers it)
+PHRASEBOOK_TEXT = "Hello"
+GEMINI_TEXT = "Cold start check {}: which bus goes to the airport from here?"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_import(env: Dict[str, str]) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET], env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def measure_first_request(env: Dict[str, str], real: bool, timeout: float = 60.0) -> Dict[str, float]:
+    import httpx
+
+    port = free_port()
+    if real:
+        command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)]
+    else:
+        command = [sys.executable, "-m", "benchmarks.loadtest", "--serve"]
+    env = {**env, "HOST": "127.0.0.1", "PORT": str(port)}
+    base_url = f"http://127.0.0.1:{port}"
+
+    started = time.perf_counter()
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    timings: Dict[str, float] = {}
+    try:
+        with httpx.Client(base_url=base_url, timeout=timeout) as client:
+            deadline = started + timeout
+            while "listening" not in timings:
+                if time.perf_counter() > deadline or process.poll() is not None:
+                    raise RuntimeError("Server did not start")
+                try:
+                    if client.get("/health").status_code == 200:
+                        timings["listening"] = time.perf_counter() - started
+                except httpx.TransportError:
+                    time.sleep(0.01)
+            for name, text in (("phrasebook", PHRASEBOOK_TEXT), ("gemini", GEMINI_TEXT.format(time.time_ns()))):
+                response = client.post("/api/v1/translate", json={"text": text, "target_lang": "ko"})
+                timings[name] = time.perf_counter() - started
+                timings[f"{name}_status"] = response.status_code
+    finally:
+        process.terminate()
+        process.wait()
+    return timings
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--real", action="store_true", help="Start the real app instead of the fake-backed one")
+    args = parser.parse_args(argv)
+
+    env = {**os.environ}
+    env.setdefault("GEMINI_API_KEY", "benchmark")
+    env.setdefault("RECOMMENDATION_WARMUP_LOCATIONS", "")
+
+    imports = [measure_import(env) for _ in range(args.runs)]
+    starts = [measure_first_request(env, args.real) for _ in range(args.runs)]
+
+    def report(label: str, values: List[float]):
+        print(f"{label:<30} median {statistics.median(values) * 1000:8.0f} ms   "
+              f"min {min(values) * 1000:8.0f} ms   max {max(values) * 1000:8.0f} ms")
+
+    report("import app.main", imports)
+    report("spawn -> listening", [run["listening"] for run in starts])
+    report("spawn -> phrasebook answer", [run["phrasebook"] for run in starts])
+    report("spawn -> first Gemini answer", [run["gemini"] for run in starts])
+    for name in ("phrasebook", "gemini"):
+        statuses = sorted({run[f"{name}_status"] for run in starts})
+        print(f"{name} request status: {', '.join(str(int(status)) for status in statuses)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,395 @@
+"""Local stand-ins for Gemini, Firestore and Firebase Auth used by the benchmarks
+
+Nothing here touches the network. `install_fakes()` swaps them into the
+global services so the real app, routers and caches run unchanged.
+"""
+
+from google.api_core import exceptions as google_exceptions
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import itertools
+import json
+import math
+import random
+import time
+import uuid
+
+
+WORDS = (
+    "Seoul Busan Jeju palace market temple hanok subway bibimbap tteokbokki "
+    "family trip morning evening view beach mountain museum street food tea"
+).split()
+
+
+class Latency:
+    """Latency distribution: log-normal around a median (sigma 0 = fixed)"""
+
+    def __init__(self, median_ms: float, sigma: float = 0.0):
+        self.median = median_ms / 1000
+        self.sigma = sigma
+
+    def sample(self) -> float:
+        if self.median <= 0:
+            return 0.0
+        if self.sigma <= 0:
+            return self.median
+        return random.lognormvariate(math.log(self.median), self.sigma)
+
+
+def filler_text(chars: int) -> str:
+    """Deterministic-length filler text"""
+    words = itertools.cycle(WORDS)
+    parts, size = [], 0
+    while size < chars:
+        word = next(words)
+        parts.append(word)
+        size += len(word) + 1
+    return " ".join(parts)[:chars]
+
+
+# Generative model
+
+class FakeCandidate:
+    def __init__(self, text: str):
+        self.token_count = max(1, len(text) // 4)
+
+
+class FakeResponse:
+    """Mimics GenerateContentResponse: `.text` and `.candidates[].token_count`"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.candidates = [FakeCandidate(text)]
+
+
+class FakeModel:
+    """Stand-in for genai.GenerativeModel, with blocking and async calls
+
+    Answers each prompt type used by GeminiService with well-formed output:
+    JSON arrays for batch translation and recommendations, filler text
+    otherwise, cut at max_output_tokens like the real API. Latency is sampled
+    per call; streams spread it over chunks.
+    """
+
+    def __init__(
+        self,
+        latency: Latency,
+        output_chars: int = 800,
+        error_rate: float = 0.0,
+        model_name: str = "models/fake-gemini"
+    ):
+        self.latency = latency
+        self.output_chars = output_chars
+        self.error_rate = error_rate
+        self.model_name = model_name
+        self.calls = 0
+
+    def _answer(self, prompt: str) -> str:
+        if "Items:\n" in prompt:
+            items = json.loads(prompt.split("Items:\n", 1)[1])
+            return json.dumps([f"[ko] {item['text']}" for item in items], ensure_ascii=False)
+        if "recommendations for" in prompt:
+            return json.dumps([
+                {
+                    "title": f"Recommendation {number}",
+                    "description": filler_text(120),
+                    "location": "Seoul",
+                    "estimated_cost": "₩10,000-20,000",
+                    "tips": ["Go early", "Bring cash"],
+                }
+                for number in range(1, 6)
+            ], ensure_ascii=False)
+        if prompt.startswith("Translate"):
+            return filler_text(min(self.output_chars, 80))
+        return filler_text(self.output_chars)
+
+    def _prepare(self, prompt: str, generation_config: Optional[Dict[str, Any]]) -> Tuple[str, bool]:
+        """The answer text, cut at max_output_tokens, and whether this call fails"""
+        self.calls += 1
+        if self.error_rate and random.random() < self.error_rate:
+            return "", True
+        text = self._answer(prompt)
+        max_tokens = (generation_config or {}).get("max_output_tokens")
+        if max_tokens:
+            text = text[:max_tokens * 4]
+        return text, False
+
+    def generate_content(
+        self,
+        prompt: str,
+        generation_config: Optional[Dict[str, Any]] = None,
+        stream: bool = False,
+        **kwargs
+    ) -> Any:
+        text, failed = self._prepare(prompt, generation_config)
+        if failed:
+            time.sleep(self.latency.sample())
+            raise google_exceptions.ServiceUnavailable("fake upstream error")
+        if stream:
+            return self._stream(text)
+        time.sleep(self.latency.sample())
+        return FakeResponse(text)
+
+    async def generate_content_async(
+        self,
+        prompt: str,
+        generation_config: Optional[Dict[str, Any]] = None,
+        stream: bool = False,
+        **kwargs
+    ) -> Any:
+        text, failed = self._prepare(prompt, generation_config)
+        if failed:
+            await asyncio.sleep(self.latency.sample())
+            raise google_exceptions.ServiceUnavailable("fake upstream error")
+        if stream:
+            return self._stream_async(text)
+        await asyncio.sleep(self.latency.sample())
+        return FakeResponse(text)
+
+    def _stream(self, text: str, chunks: int = 8) -> Iterator[FakeResponse]:
+        delay = self.latency.sample() / chunks
+        size = max(1, math.ceil(len(text) / chunks))
+        for start in range(0, len(text), size):
+            time.sleep(delay)
+            yield FakeResponse(text[start:start + size])
+
+    async def _stream_async(self, text: str, chunks: int = 8) -> AsyncIterator[FakeResponse]:
+        delay = self.latency.sample() / chunks
+        size = max(1, math.ceil(len(text) / chunks))
+        for start in range(0, len(text), size):
+            await asyncio.sleep(delay)
+            yield FakeResponse(text[start:start + size])
+
+    def start_chat(self, history: Optional[List[Any]] = None) -> "FakeChat":
+        return FakeChat(self, history)
+
+
+class FakeChat:
+    """Stand-in for ChatSession: messages are answered like translation prompts"""
+
+    def __init__(self, model: FakeModel, history: Optional[List[Any]] = None):
+        self.model = model
+        self.history = list(history or [])
+
+    def send_message(self, content: str, generation_config: Optional[Dict[str, Any]] = None,
+                     stream: bool = False, **kwargs) -> Any:
+        return self.model.generate_content(f"Translate:\n{content}", generation_config, stream)
+
+    async def send_message_async(self, content: str, generation_config: Optional[Dict[str, Any]] = None,
+                                 stream: bool = False, **kwargs) -> Any:
+        return await self.model.generate_content_async(f"Translate:\n{content}", generation_config, stream)
+
+
+# Firestore
+
+def _copy_document(data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Copy a flat document so callers can't mutate the store (cheaper than deepcopy,
+    which would dominate the benchmark's own CPU time)"""
+    if data is None:
+        return None
+    return {
+        key: list(value) if isinstance(value, list) else dict(value) if isinstance(value, dict) else value
+        for key, value in data.items()
+    }
+
+
+class FakeSnapshot:
+    def __init__(self, reference: "FakeDocument", data: Optional[Dict[str, Any]]):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return _copy_document(self._data)
+
+    def get(self, field: str) -> Any:
+        return (self._data or {}).get(field)
+
+
+class FakeDocument:
+    def __init__(self, db: "FakeFirestore", collection: str, doc_id: Optional[str] = None):
+        self._db = db
+        self._store = db.data.setdefault(collection, {})
+        self.id = doc_id or uuid.uuid4().hex[:20]
+
+    async def get(self) -> FakeSnapshot:
+        await self._db.rpc()
+        return FakeSnapshot(self, _copy_document(self._store.get(self.id)))
+
+    async def set(self, data: Dict[str, Any]):
+        await self._db.rpc()
+        self._set(data)
+
+    async def update(self, data: Dict[str, Any]):
+        await self._db.rpc()
+        self._update(data)
+
+    async def delete(self):
+        await self._db.rpc()
+        self._store.pop(self.id, None)
+
+    def _set(self, data: Dict[str, Any]):
+        self._store[self.id] = _copy_document(data)
+
+    def _update(self, data: Dict[str, Any]):
+        if self.id not in self._store:
+            raise google_exceptions.NotFound(f"No document to update: {self.id}")
+        self._store[self.id].update(_copy_document(data))
+
+
+class FakeQuery:
+    """Supports the subset FirebaseService uses: ==/array_contains filters, one order_by,
+    select, start_after (snapshot), limit and stream()"""
+
+    def __init__(self, db: "FakeFirestore", collection: str, **state):
+        self._db = db
+        self._collection = collection
+        self._filters: Tuple = state.get("filters", ())
+        self._order: Optional[str] = state.get("order")
+        self._fields: Optional[List[str]] = state.get("fields")
+        self._after: Optional[FakeSnapshot] = state.get("after")
+        self._limit: Optional[int] = state.get("limit")
+
+    def _copy(self, **changes) -> "FakeQuery":
+        state = dict(
+            filters=self._filters, order=self._order, fields=self._fields,
+            after=self._after, limit=self._limit
+        )
+        state.update(changes)
+        return FakeQuery(self._db, self._collection, **state)
+
+    def where(self, field: str, op: str, value: Any) -> "FakeQuery":
+        if op not in ("==", "array_contains"):
+            raise ValueError(f"Unsupported operator in fake Firestore: {op}")
+        return self._copy(filters=self._filters + ((field, op, value),))
+
+    def order_by(self, field: str) -> "FakeQuery":
+        return self._copy(order=field)
+
+    def select(self, fields: List[str]) -> "FakeQuery":
+        return self._copy(fields=list(fields))
+
+    def start_after(self, snapshot: FakeSnapshot) -> "FakeQuery":
+        return self._copy(after=snapshot)
+
+    def limit(self, count: int) -> "FakeQuery":
+        return self._copy(limit=count)
+
+    def _matches(self, data: Dict[str, Any]) -> bool:
+        for field, op, value in self._filters:
+            if op == "==" and data.get(field) != value:
+                return False
+            if op == "array_contains" and value not in (data.get(field) or []):
+                return False
+        return True
+
+    async def stream(self):
+        await self._db.rpc()
+        store = self._db.data.setdefault(self._collection, {})
+        items = [(doc_id, data) for doc_id, data in store.items() if self._matches(data)]
+        if self._order:
+            items.sort(key=lambda item: (item[1].get(self._order), item[0]))
+            if self._after is not None:
+                cursor = (self._after.get(self._order), self._after.id)
+                items = [item for item in items if (item[1].get(self._order), item[0]) > cursor]
+        if self._limit:
+            items = items[:self._limit]
+        for doc_id, data in items:
+            if self._fields:
+                data = {field: data[field] for field in self._fields if field in data}
+            yield FakeSnapshot(FakeDocument(self._db, self._collection, doc_id), _copy_document(data))
+
+
+class FakeCollection(FakeQuery):
+    def document(self, doc_id: Optional[str] = None) -> FakeDocument:
+        return FakeDocument(self._db, self._collection, doc_id)
+
+
+class FakeWriteBatch:
+    """All-or-nothing like a Firestore batch: fails before applying anything if an update target is missing"""
+
+    def __init__(self, db: "FakeFirestore"):
+        self._db = db
+        self._writes: List[Tuple[str, FakeDocument, Optional[Dict[str, Any]]]] = []
+
+    def set(self, reference: FakeDocument, data: Dict[str, Any]):
+        self._writes.append(("set", reference, data))
+
+    def update(self, reference: FakeDocument, data: Dict[str, Any]):
+        self._writes.append(("update", reference, data))
+
+    def delete(self, reference: FakeDocument):
+        self._writes.append(("delete", reference, None))
+
+    async def commit(self):
+        await self._db.rpc()
+        for op, reference, _ in self._writes:
+            if op == "update" and reference.id not in reference._store:
+                raise google_exceptions.NotFound(f"No document to update: {reference.id}")
+        for op, reference, data in self._writes:
+            if op == "set":
+                reference._set(data)
+            elif op == "update":
+                reference._update(data)
+            else:
+                reference._store.pop(reference.id, None)
+
+
+class FakeFirestore:
+    """In-memory stand-in for firestore_async.AsyncClient with per-RPC latency"""
+
+    def __init__(self, latency: Latency):
+        self.latency = latency
+        self.data: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.rpcs = 0
+
+    async def rpc(self):
+        self.rpcs += 1
+        await asyncio.sleep(self.latency.sample())
+
+    def collection(self, name: str) -> FakeCollection:
+        return FakeCollection(self, name)
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+
+# Auth
+
+class FakeAuth:
+    """Accepts `bench-<uid>` tokens in place of Firebase ID tokens"""
+
+    def verify_id_token(self, token: str) -> Dict[str, Any]:
+        if not token.startswith("bench-"):
+            raise ValueError("Not a benchmark token")
+        return {"uid": token[len("bench-"):], "exp": time.time() + 3600}
+
+
+def install_fakes(
+    gemini_latency: Latency,
+    firestore_latency: Latency,
+    output_chars: int = 800,
+    gemini_error_rate: float = 0.0
+) -> Tuple[Dict[str, FakeModel], FakeFirestore]:
+    """Point the global services at the fakes (call before the app starts)
+
+    Returns the fake models by tier name (filled in as they are first used)
+    and the fake Firestore.
+    """
+    from app.services.firebase_service import firebase_service
+    from app.services.gemini_service import gemini_service
+
+    models: Dict[str, FakeModel] = {}
+
+    def model_factory(name: str) -> FakeModel:
+        return models.setdefault(name, FakeModel(gemini_latency, output_chars, gemini_error_rate, f"models/{name}"))
+
+    db = FakeFirestore(firestore_latency)
+    gemini_service.model_factory = model_factory
+    firebase_service._db = db
+    firebase_service._auth = FakeAuth()
+    firebase_service.is_initialized = True
+    # No signing certificates to fetch
+    firebase_service._refresh_public_keys = lambda: None
+    return models, db
@@ -0,0 +1,423 @@
+"""Load test for the API running in-process against local Gemini/Firestore fakes
+
+Run from backend/ (no network or credentials needed):
+
+    python -m benchmarks.loadtest --duration 10 --concurrency 32
+    python -m benchmarks.loadtest --save-baseline benchmarks/baselines/default.json
+    python -m benchmarks.loadtest --compare benchmarks/baselines/default.json
+    python -m benchmarks.loadtest --serve    # serve the app against the fakes on HOST:PORT
+
+Reports throughput, p50/p95/p99 latency per scenario and event loop lag.
+Requests go through httpx's ASGI transport on the app's own event loop, so
+client overhead is included; compare runs on the same machine only.
+WebSocket sessions, which httpx's transport doesn't support, are driven
+through the ASGI interface directly.
+With --compare, exits with status 1 when a scenario's median latency or
+the total throughput regresses by more than --tolerance against the
+stored baseline.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from urllib.parse import urlencode
+
+import httpx
+
+from benchmarks.fakes import Latency, install_fakes
+
+USERS = 50
+TRIPS_PER_USER = 20
+PHRASES = [f"Where is the nearest {word} station number {n}?" for n in range(40) for word in ("subway", "bus", "taxi")]
+QUERIES = [f"What should a family with kids do in {city} on day {day}?" for city in ("Seoul", "Busan", "Jeju") for day in range(1, 11)]
+ITINERARIES = [(city, days) for city in ("Seoul", "Busan", "Jeju", "Gyeongju") for days in range(2, 8)]
+CATEGORIES = ["restaurants", "attractions", "activities"]
+LOCATIONS = ["Seoul", "Busan", "Jeju", "Gyeongju", "Incheon", "Daegu"]
+
+API = "/api/v1"
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))]
+
+
+def summarize(latencies: List[float], errors: int, duration: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "rps": round(len(ordered) / duration, 1),
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+    }
+
+
+def seed_trips(db) -> Dict[str, List[str]]:
+    """Write trips straight into the fake store, returning trip IDs by user"""
+    trips = db.data.setdefault("trips", {})
+    by_user: Dict[str, List[str]] = {}
+    start = datetime(2026, 1, 1)
+    for user in range(USERS):
+        uid = f"user{user}"
+        for number in range(TRIPS_PER_USER):
+            trip_id = f"{uid}-trip{number}"
+            trips[trip_id] = {
+                "title": f"Trip {number}",
+                "description": "Family trip around Korea",
+                "start_date": start + timedelta(days=number * 7),
+                "end_date": start + timedelta(days=number * 7 + 5),
+                "destinations": ["Seoul", "Busan"],
+                "participants": [uid, f"user{(user + 1) % USERS}"],
+                "created_by": uid,
+                "created_at": start,
+                "updated_at": start,
+            }
+            by_user.setdefault(uid, []).append(trip_id)
+    return by_user
+
+
+class WebSocketSession:
+    """Minimal in-process WebSocket client speaking ASGI to the app"""
+
+    def __init__(self, app, path: str, params: Dict[str, str]):
+        self.scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": urlencode(params).encode(),
+            "headers": [(b"host", b"bench")],
+            "client": ("127.0.0.1", 50000),
+            "server": ("bench", 80),
+            "subprotocols": [],
+        }
+        self.app = app
+        self._incoming: asyncio.Queue = asyncio.Queue()
+        self._outgoing: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "WebSocketSession":
+        self._incoming.put_nowait({"type": "websocket.connect"})
+        self._task = asyncio.create_task(self.app(self.scope, self._incoming.get, self._outgoing.put))
+        message = await self._outgoing.get()
+        if message["type"] != "websocket.accept":
+            raise ConnectionError(f"WebSocket rejected: {message}")
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._incoming.put_nowait({"type": "websocket.disconnect", "code": 1000})
+        await self._task
+
+    async def send_json(self, data: Any):
+        self._incoming.put_nowait({"type": "websocket.receive", "text": json.dumps(data)})
+
+    async def receive_json(self) -> Any:
+        message = await self._outgoing.get()
+        if message["type"] != "websocket.send":
+            raise ConnectionError(f"WebSocket closed: {message}")
+        return json.loads(message["text"])
+
+
+class Scenarios:
+    """One request per scenario, against a randomly chosen user and input"""
+
+    def __init__(self, app, client, trips_by_user: Dict[str, List[str]], rng: random.Random):
+        self.app = app
+        self.client = client
+        self.trips_by_user = trips_by_user
+        self.rng = rng
+
+    def _user(self):
+        uid = f"user{self.rng.randrange(USERS)}"
+        return uid, {"Authorization": f"Bearer bench-{uid}"}
+
+    def _trip_body(self, uid: str) -> Dict[str, Any]:
+        return {
+            "title": "Load test trip",
+            "start_date": "2026-05-01T00:00:00",
+            "end_date": "2026-05-05T00:00:00",
+            "destinations": ["Jeju"],
+            "participants": [uid],
+            "created_by": uid,
+        }
+
+    async def translate(self):
+        return await self.client.post(f"{API}/translate", json={
+            "text": self.rng.choice(PHRASES), "source_lang": "en", "target_lang": "ko"
+        })
+
+    async def translate_batch(self):
+        return await self.client.post(f"{API}/translate/batch", json={"items": [
+            {"text": self.rng.choice(PHRASES), "source_lang": "en", "target_lang": "ko"} for _ in range(20)
+        ]})
+
+    async def translate_ws(self):
+        """A short conversation: a few utterances over one translation session"""
+        params = {"source_lang": "en", "target_lang": "ko"}
+        async with WebSocketSession(self.app, f"{API}/translate/ws", params) as session:
+            for number in range(3):
+                await session.send_json({"id": number, "text": self.rng.choice(PHRASES)})
+                while True:
+                    message = await session.receive_json()
+                    if message["type"] == "error":
+                        raise RuntimeError(message["detail"])
+                    if message["type"] == "done":
+                        break
+        # Counted like an HTTP response; errors above raise instead
+        return httpx.Response(101)
+
+    async def ai_guide(self):
+        return await self.client.post(f"{API}/ai-guide", json={"query": self.rng.choice(QUERIES)})
+
+    async def ai_guide_stream(self):
+        return await self.client.post(f"{API}/ai-guide/stream", json={"query": self.rng.choice(QUERIES)})
+
+    async def ai_guide_job(self):
+        """Submit a background itinerary job saved on one of the user's trips, then long-poll it"""
+        uid, headers = self._user()
+        city, days = self.rng.choice(ITINERARIES)
+        submitted = await self.client.post(f"{API}/ai-guide/jobs", headers=headers, json={
+            "query": f"Plan a {days}-day family itinerary in {city}",
+            "trip_dates": {"start": "2026-05-01", "end": f"2026-05-0{days}"},
+            "preferences": ["food", "kids"],
+            "trip_id": self.rng.choice(self.trips_by_user[uid]),
+        })
+        if submitted.status_code >= 400:
+            return submitted
+        job_id = submitted.json()["id"]
+        while True:
+            response = await self.client.get(f"{API}/ai-guide/jobs/{job_id}", params={"wait": 30})
+            if response.status_code >= 400 or response.json()["status"] == "succeeded":
+                return response
+            if response.json()["status"] == "failed":
+                raise RuntimeError(response.json()["error"])
+
+    async def recommendations(self):
+        category, location = self.rng.choice(CATEGORIES), self.rng.choice(LOCATIONS)
+        return await self.client.get(f"{API}/recommendations/{category}/{location}")
+
+    async def trips_get(self):
+        uid, headers = self._user()
+        return await self.client.get(f"{API}/trips/{self.rng.choice(self.trips_by_user[uid])}", headers=headers)
+
+    async def trips_list(self):
+        _, headers = self._user()
+        return await self.client.get(f"{API}/trips", params={"limit": 20}, headers=headers)
+
+    async def trips_me(self):
+        _, headers = self._user()
+        return await self.client.get(f"{API}/trips/me", params={"limit": 20}, headers=headers)
+
+    async def trips_participant(self):
+        _, headers = self._user()
+        return await self.client.get(f"{API}/trips/participant/me", params={"limit": 20}, headers=headers)
+
+    async def trips_create(self):
+        uid, headers = self._user()
+        return await self.client.post(f"{API}/trips", json=self._trip_body(uid), headers=headers)
+
+    async def trips_update(self):
+        uid, headers = self._user()
+        trip_id = self.rng.choice(self.trips_by_user[uid])
+        return await self.client.put(f"{API}/trips/{trip_id}", json={"title": "Renamed"}, headers=headers)
+
+    async def trips_bulk(self):
+        uid, headers = self._user()
+        operations = [{"op": "create", "data": self._trip_body(uid)} for _ in range(50)]
+        return await self.client.post(f"{API}/trips/bulk", json={"operations": operations}, headers=headers)
+
+
+# Relative request mix
+WEIGHTS = {
+    "translate": 20,
+    "translate_batch": 3,
+    "translate_ws": 2,
+    "ai_guide": 5,
+    "ai_guide_stream": 3,
+    "ai_guide_job": 2,
+    "recommendations": 10,
+    "trips_get": 20,
+    "trips_list": 10,
+    "trips_me": 10,
+    "trips_participant": 5,
+    "trips_create": 5,
+    "trips_update": 5,
+    "trips_bulk": 1,
+}
+
+
+async def measure_loop_lag(samples: List[float], stop: asyncio.Event, interval: float = 0.01):
+    """Record how late the event loop wakes a sleeping task (event loop lag)"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - started - interval))
+
+
+async def run_load(app, trips_by_user, duration: float, concurrency: int, seed: int) -> Dict[str, Any]:
+    names = list(WEIGHTS)
+    weights = [WEIGHTS[name] for name in names]
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, int] = {name: 0 for name in names}
+    lag: List[float] = []
+    stop = asyncio.Event()
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+
+            async def worker(number: int):
+                rng = random.Random(seed + number)
+                scenarios = Scenarios(app, client, trips_by_user, rng)
+                while not stop.is_set():
+                    name = rng.choices(names, weights)[0]
+                    started = time.perf_counter()
+                    try:
+                        response = await getattr(scenarios, name)()
+                        failed = response.status_code >= 400
+                    except Exception:
+                        failed = True
+                    latencies[name].append(time.perf_counter() - started)
+                    errors[name] += failed
+
+            lag_task = asyncio.create_task(measure_loop_lag(lag, stop))
+            workers = [asyncio.create_task(worker(number)) for number in range(concurrency)]
+            started = time.perf_counter()
+            await asyncio.sleep(duration)
+            stop.set()
+            await asyncio.gather(*workers)
+            elapsed = time.perf_counter() - started
+            await lag_task
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    ordered_lag = sorted(lag)
+    return {
+        "total": summarize(all_latencies, sum(errors.values()), elapsed),
+        "scenarios": {name: summarize(latencies[name], errors[name], elapsed) for name in names if latencies[name]},
+        "loop_lag_ms": {
+            "p50": round(percentile(ordered_lag, 0.50) * 1000, 2),
+            "p99": round(percentile(ordered_lag, 0.99) * 1000, 2),
+            "max": round((ordered_lag[-1] if ordered_lag else 0.0) * 1000, 2),
+        },
+    }
+
+
+def print_report(results: Dict[str, Any]):
+    print(f"\n{'scenario':<20}{'requests':>10}{'errors':>8}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    rows = [*results["scenarios"].items(), ("TOTAL", results["total"])]
+    for name, row in rows:
+        print(f"{name:<20}{row['requests']:>10}{row['errors']:>8}{row['rps']:>9}"
+              f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}")
+    lag = results["loop_lag_ms"]
+    print(f"\nevent loop lag: p50 {lag['p50']} ms, p99 {lag['p99']} ms, max {lag['max']} ms")
+
+
+def compare(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float,
+    floor_ms: float,
+    min_requests: int
+) -> List[str]:
+    """Regressions beyond tolerance in median latency per scenario and in total throughput
+
+    Tail percentiles of a short run swing by more than any useful tolerance
+    between identical runs, so medians are compared. Scenarios with fewer
+    than min_requests requests in either run are skipped, and latency
+    changes under floor_ms are treated as noise.
+    """
+    regressions = []
+    for name, base in baseline["scenarios"].items():
+        current = results["scenarios"].get(name)
+        if current is None or min(current["requests"], base["requests"]) < min_requests:
+            continue
+        limit = base["p50_ms"] * (1 + tolerance)
+        if current["p50_ms"] > limit and current["p50_ms"] - base["p50_ms"] > floor_ms:
+            regressions.append(f"{name}: p50 {base['p50_ms']} -> {current['p50_ms']} ms")
+    base_rps, rps = baseline["total"]["rps"], results["total"]["rps"]
+    if rps < base_rps * (1 - tolerance):
+        regressions.append(f"throughput: {base_rps} -> {rps} req/s")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--gemini-latency-ms", type=float, default=300.0, help="Median fake Gemini latency")
+    parser.add_argument("--gemini-latency-sigma", type=float, default=0.5, help="Log-normal spread (0 = fixed)")
+    parser.add_argument("--gemini-output-chars", type=int, default=800, help="Fake answer size")
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0, help="Share of calls failing with 503")
+    parser.add_argument("--firestore-latency-ms", type=float, default=5.0, help="Median fake Firestore RPC latency")
+    parser.add_argument("--firestore-latency-sigma", type=float, default=0.3)
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--save-baseline", help="Write results as the new baseline")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression")
+    parser.add_argument("--floor-ms", type=float, default=10.0, help="Ignore p50 changes smaller than this")
+    parser.add_argument("--min-requests", type=int, default=50,
+                        help="Skip scenarios with fewer requests than this in either run")
+    parser.add_argument("--serve", action="store_true", help="Serve the app against the fakes instead")
+    args = parser.parse_args(argv)
+
+    # Settings are read at import; measure the app rather than the production quota
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    os.environ.setdefault("GEMINI_RATE_LIMIT_PER_MINUTE", "0")
+    random.seed(args.seed)
+
+    from app.config import settings
+    from app.main import app
+
+    _, db = install_fakes(
+        Latency(args.gemini_latency_ms, args.gemini_latency_sigma),
+        Latency(args.firestore_latency_ms, args.firestore_latency_sigma),
+        output_chars=args.gemini_output_chars,
+        gemini_error_rate=args.gemini_error_rate
+    )
+    trips_by_user = seed_trips(db)
+
+    if args.serve:
+        import uvicorn
+        print("🧪 Serving against local fakes; use 'Bearer bench-user0' style tokens")
+        uvicorn.run(app, host=settings.host, port=settings.port)
+        return 0
+
+    results = asyncio.run(run_load(app, trips_by_user, args.duration, args.concurrency, args.seed))
+    results["config"] = {key: value for key, value in vars(args).items()
+                         if key not in ("output", "save_baseline", "compare", "tolerance", "floor_ms", "min_requests", "serve")}
+    print_report(results)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+                f.write("\n")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.floor_ms, args.min_requests)
+        if regressions:
+            print("\n❌ Regressions against baseline:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print("\n✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""Shared fixtures: the app runs against the local fakes from benchmarks.fakes"""
+
+import asyncio
+import os
+import time
+
+import pytest
+
+# Settings are read when the app is imported
+os.environ.setdefault("GEMINI_API_KEY", "test")
+os.environ.setdefault("RECOMMENDATION_WARMUP_LOCATIONS", "")
+
+from benchmarks.fakes import Latency, install_fakes  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def fakes():
+    """Fake Gemini models (by tier) and Firestore installed into the global services"""
+    return install_fakes(Latency(200), Latency(1))
+
+
+@pytest.fixture
+def app(fakes):
+    from app.main import app
+    return app
+
+
+async def call_asgi(app, method: str, path: str, headers=(), body: bytes = b""):
+    """Run one request through the ASGI app, returning (seconds since start, message) per sent message
+
+    Unlike TestClient, which buffers the whole body, this shows when each chunk was sent.
+    """
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    sent = []
+    requested = False
+    started = time.perf_counter()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # The client stays connected until the response ends
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append((time.perf_counter() - started, message))
+
+    await app(scope, receive, send)
+    return sent
+
+
+@pytest.fixture
+def asgi():
+    return call_asgi
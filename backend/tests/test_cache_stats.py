@@ -0,0 +1,19 @@
+"""Cache statistics endpoints require authentication"""
+
+import asyncio
+
+import pytest
+
+PATHS = ["/api/v1/translate/cache/stats", "/api/v1/trips/cache/stats"]
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_stats_require_a_token(app, asgi, path):
+    sent = asyncio.run(asgi(app, "GET", path))
+    assert sent[0][1]["status"] == 401
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_stats_with_a_token(app, asgi, path):
+    sent = asyncio.run(asgi(app, "GET", path, [("Authorization", "Bearer bench-user")]))
+    assert sent[0][1]["status"] == 200
@@ -0,0 +1,61 @@
+"""Gzip must not hold back streamed responses"""
+
+import asyncio
+import json
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+GZIP = ("Accept-Encoding", "gzip, deflate, br")
+
+
+def header(start_message, name: str):
+    return dict(start_message["headers"]).get(name.encode())
+
+
+def bodies(sent):
+    return [(at, message) for at, message in sent if message["type"] == "http.response.body"]
+
+
+def test_sse_events_arrive_before_stream_ends_with_gzip_accepted(app, asgi):
+    request = json.dumps({"query": "Day trip ideas from Seoul"}).encode()
+    sent = asyncio.run(asgi(
+        app, "POST", "/api/v1/ai-guide/stream",
+        headers=[GZIP, ("Content-Type", "application/json")], body=request
+    ))
+
+    start = sent[0][1]
+    assert start["type"] == "http.response.start"
+    assert header(start, "content-encoding") is None
+
+    chunks = [(at, message) for at, message in bodies(sent) if message.get("body")]
+    first_at, first = chunks[0]
+    last_at = bodies(sent)[-1][0]
+    assert first["body"].startswith(b"event: chunk")
+    assert first.get("more_body")
+    assert first_at < last_at
+    assert b"event: done" in b"".join(message["body"] for _, message in chunks)
+
+
+def test_ndjson_trip_stream_is_not_compressed(app, asgi, fakes):
+    _, db = fakes
+    now = datetime.utcnow()
+    for number in range(20):
+        db.data.setdefault("trips", {})[f"gzip-{number}"] = {
+            "title": f"Trip {number}", "description": "x" * 200, "start_date": now, "end_date": now,
+            "destinations": [], "participants": [], "created_by": "gzip-user",
+            "created_at": now, "updated_at": now,
+        }
+    sent = asyncio.run(asgi(
+        app, "GET", "/api/v1/trips?stream=true", headers=[GZIP, ("Authorization", "Bearer bench-gzip-user")]
+    ))
+
+    assert header(sent[0][1], "content-encoding") is None
+    first = next(message for _, message in bodies(sent) if message.get("body"))
+    assert json.loads(first["body"].splitlines()[0])["title"].startswith("Trip")
+
+
+def test_json_responses_are_still_compressed(app):
+    with TestClient(app) as client:
+        response = client.get("/openapi.json", headers=dict([GZIP]))
+    assert response.headers["content-encoding"] == "gzip"
@@ -0,0 +1,57 @@
+"""Phrasebook lookups: exact and fuzzy matches, and fuzzy matches that would flip a negation"""
+
+import pytest
+
+from app.services.phrasebook import Phrasebook
+
+
+@pytest.fixture(scope="module")
+def phrasebook():
+    phrasebook = Phrasebook()
+    phrasebook.load()
+    return phrasebook
+
+
+@pytest.mark.parametrize("text, source, target, expected", [
+    ("Hello", "en", "ko", "안녕하세요"),
+    ("where is the RESTROOM", "en", "ko", "화장실이 어디예요?"),
+    ("화장실이어디예요", "ko", "en", "Where is the restroom?"),
+    ("I cant eat spicy food", "en", "ko", "매운 음식을 못 먹어요"),
+    ("감사합니다", "auto", "ja", "ありがとうございます"),
+])
+def test_exact_matches(phrasebook, text, source, target, expected):
+    assert phrasebook.lookup(text, source, target) == (expected, False)
+
+
+@pytest.mark.parametrize("text, source, target, expected", [
+    ("Where is the restrom?", "en", "ko", "화장실이 어디예요?"),
+    ("I can't eat spicy foods", "en", "ko", "매운 음식을 못 먹어요"),
+    ("Please speek slowly", "en", "ko", "천천히 말씀해 주세요"),
+    # Particles dropped in speech
+    ("화장실 어디예요?", "ko", "en", "Where is the restroom?"),
+    ("매운 음식 못 먹어요", "ko", "en", "I can't eat spicy food"),
+])
+def test_fuzzy_matches(phrasebook, text, source, target, expected):
+    assert phrasebook.lookup(text, source, target) == (expected, True)
+
+
+@pytest.mark.parametrize("text, source, target", [
+    # One edit from a negated phrase, with the opposite meaning
+    ("I can eat spicy food", "en", "ko"),
+    # Too short to tolerate typos, or no close phrase
+    ("Helo", "en", "ko"),
+    ("Where is the train to Busan?", "en", "ko"),
+])
+def test_misses(phrasebook, text, source, target):
+    assert phrasebook.lookup(text, source, target) is None
+
+
+def test_fuzzy_match_keeps_korean_negation(tmp_path):
+    path = tmp_path / "phrasebook.tsv"
+    path.write_text("en\tko\nYou cannot park here\t여기에 주차할 수 없어요\n", encoding="utf-8")
+    phrasebook = Phrasebook()
+    phrasebook.load(path)
+
+    assert phrasebook.lookup("여기에 주차할 수 없어요", "ko", "en") == ("You cannot park here", False)
+    # Two jamo edits away, within the limit for a key this long, but "can" rather than "cannot"
+    assert phrasebook.lookup("여기에 주차할 수 있어요", "ko", "en") is None
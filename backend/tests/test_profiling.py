@@ -0,0 +1,35 @@
+"""Profiling token checks"""
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.profiling import ProfilingMiddleware
+
+
+def make_client(tmp_path, monkeypatch) -> TestClient:
+    monkeypatch.setattr(settings, "profiling_token", "s3cret")
+    monkeypatch.setattr(settings, "profiling_sample_rate", 0.0)
+    monkeypatch.setattr(settings, "profiling_output_dir", str(tmp_path))
+    app = FastAPI()
+
+    @app.get("/")
+    async def root():
+        return {"ok": True}
+
+    app.add_middleware(ProfilingMiddleware)
+    return TestClient(app)
+
+
+def test_non_ascii_token_is_rejected_not_an_error(tmp_path, monkeypatch):
+    client = make_client(tmp_path, monkeypatch)
+    response = client.get("/", headers={"X-Profile": "café".encode("utf-8")})
+    assert response.status_code == 200
+    assert "x-profile-file" not in response.headers
+
+
+def test_matching_token_is_profiled(tmp_path, monkeypatch):
+    client = make_client(tmp_path, monkeypatch)
+    response = client.get("/", headers={"X-Profile": "s3cret"})
+    assert response.status_code == 200
+    assert (tmp_path / response.headers["x-profile-file"]).exists()
@@ -0,0 +1,179 @@
+"""Rate limiting, deadlines and the circuit breaker, against the injectable fake model"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.config import settings
+from app.services.gemini_service import GeminiService
+from app.services.resilience import CircuitBreaker, CircuitOpenError
+from app.services.scheduler import PriorityScheduler, RateLimitExceeded
+from benchmarks.fakes import FakeModel, Latency
+
+
+def make_service(model: FakeModel, rate: float, burst: int = 1) -> GeminiService:
+    service = GeminiService(model_factory=lambda name: model)
+    service.scheduler = PriorityScheduler(rate=rate, burst=burst, max_queue=100)
+    return service
+
+
+class HangingLatency(Latency):
+    """The first `hangs` calls take far longer than any deadline, later ones are quick"""
+
+    def __init__(self, hangs: int, median_ms: float = 10):
+        super().__init__(median_ms)
+        self.hangs = hangs
+
+    def sample(self) -> float:
+        if self.hangs:
+            self.hangs -= 1
+            return 30.0
+        return super().sample()
+
+
+def prompts(count: int):
+    # Distinct prompts, so single-flight doesn't merge the calls
+    return [f"Background prompt {number}" for number in range(count)]
+
+
+def test_queue_wait_does_not_count_against_the_call_deadline(monkeypatch):
+    monkeypatch.setitem(settings.gemini_call_policies, "background", {"timeout": 0.2, "retries": 0})
+    monkeypatch.setitem(settings.gemini_queue_deadlines, "background", 5.0)
+    model = FakeModel(Latency(10))
+    # One token every 0.1 s: the last of five calls waits about 0.4 s, twice the deadline
+    service = make_service(model, rate=10)
+
+    async def run():
+        return await asyncio.gather(*(service._generate(prompt, "background") for prompt in prompts(5)))
+
+    results = asyncio.run(run())
+    assert len(results) == 5 and all(results)
+    assert service.breaker.state == "closed" and service.breaker.failures == 0
+    # Only time spent calling the model feeds the hedging latency history
+    assert service._latency["background"].quantile(1.0) < 0.2
+
+
+def test_timed_out_calls_free_their_slots(monkeypatch):
+    monkeypatch.setattr(settings, "gemini_max_concurrency", 2)
+    monkeypatch.setitem(settings.gemini_call_policies, "background", {"timeout": 0.2, "retries": 0})
+    model = FakeModel(HangingLatency(hangs=2))
+    service = make_service(model, rate=0)
+
+    async def run():
+        hung = await asyncio.gather(
+            *(service._generate(prompt, "background") for prompt in prompts(2)), return_exceptions=True
+        )
+        assert all(isinstance(result, asyncio.TimeoutError) for result in hung)
+        # Both slots were taken by the hung calls; later calls must not wait on them
+        started = time.perf_counter()
+        results = await asyncio.gather(*(service._generate(f"Later {prompt}", "background") for prompt in prompts(4)))
+        return results, time.perf_counter() - started
+
+    results, elapsed = asyncio.run(run())
+    assert all(results)
+    assert elapsed < 0.2
+
+
+def test_timed_out_attempt_frees_its_slot_for_the_retry(monkeypatch):
+    monkeypatch.setattr(settings, "gemini_max_concurrency", 1)
+    monkeypatch.setitem(settings.gemini_call_policies, "background", {
+        "timeout": 0.2, "retries": 1, "backoff_base": 0.0
+    })
+    model = FakeModel(HangingLatency(hangs=1))
+    service = make_service(model, rate=0)
+
+    result = asyncio.run(service._generate("Background prompt", "background"))
+    assert result
+    assert model.calls == 2
+    assert service.breaker.state == "closed" and service.breaker.failures == 0
+
+
+def test_losing_hedge_frees_its_slot(monkeypatch):
+    monkeypatch.setattr(settings, "gemini_max_concurrency", 2)
+    monkeypatch.setitem(settings.gemini_call_policies, "background", {
+        "timeout": 5.0, "retries": 0, "hedge": True, "hedge_min_delay": 0.3, "hedge_min_samples": 0
+    })
+    model = FakeModel(HangingLatency(hangs=1, median_ms=100))
+    service = make_service(model, rate=0)
+
+    async def run():
+        assert await service._generate("Hedged prompt", "background")
+        # The hung first request was cancelled, so both slots are free: two calls run side by side
+        return await asyncio.gather(*(
+            asyncio.wait_for(service._generate(prompt, "background"), 0.18) for prompt in prompts(2)
+        ))
+
+    assert all(asyncio.run(run()))
+    assert model.calls == 4
+
+
+def test_queue_deadline_rejections_are_not_breaker_failures(monkeypatch):
+    monkeypatch.setitem(settings.gemini_call_policies, "background", {"timeout": 5.0, "retries": 2})
+    monkeypatch.setitem(settings.gemini_queue_deadlines, "background", 0.05)
+    model = FakeModel(Latency(10))
+    service = make_service(model, rate=1)
+    service.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+
+    async def run():
+        return await asyncio.gather(
+            *(service._generate(prompt, "background") for prompt in prompts(4)), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    rejected = [result for result in results if isinstance(result, RateLimitExceeded)]
+    assert len(rejected) == 3
+    # Rejected calls were neither retried nor sent upstream
+    assert model.calls == 1
+    assert service.breaker.state == "closed" and service.breaker.failures == 0
+
+
+def test_upstream_failures_open_the_breaker(monkeypatch):
+    monkeypatch.setitem(settings.gemini_call_policies, "background", {"timeout": 1.0, "retries": 0})
+    model = FakeModel(Latency(1), error_rate=1.0)
+    service = make_service(model, rate=0)
+    service.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+
+    async def run():
+        for prompt in prompts(2):
+            with pytest.raises(Exception):
+                await service._generate(prompt, "background")
+        with pytest.raises(CircuitOpenError):
+            await service._generate("One more", "background")
+
+    asyncio.run(run())
+    assert service.breaker.state == "open"
+    # The call made while open failed fast
+    assert model.calls == 2
+
+
+def test_scheduler_admits_higher_priority_first():
+    scheduler = PriorityScheduler(rate=20, burst=1, max_queue=10)
+    admitted = []
+
+    async def call(operation: str):
+        await scheduler.acquire(operation, deadline=1.0)
+        admitted.append(operation)
+
+    async def run():
+        await scheduler.acquire("translate")
+        # Queued behind the spent token, background first
+        await asyncio.gather(call("background"), call("guide_job"), call("translate"))
+
+    asyncio.run(run())
+    assert admitted == ["translate", "guide_job", "background"]
+
+
+def test_scheduler_rejects_when_queue_is_full():
+    scheduler = PriorityScheduler(rate=1, burst=1, max_queue=1)
+
+    async def run():
+        await scheduler.acquire("translate")
+        waiting = asyncio.ensure_future(scheduler.acquire("translate", deadline=2.0))
+        await asyncio.sleep(0)
+        with pytest.raises(RateLimitExceeded):
+            await scheduler.acquire("translate")
+        waiting.cancel()
+
+    asyncio.run(run())
+    assert scheduler.stats()["rejected"] == 1
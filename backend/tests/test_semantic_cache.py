@@ -0,0 +1,78 @@
+"""Semantic /ai-guide cache matching"""
+
+import pytest
+
+from app.config import settings
+from app.services.semantic_cache import SemanticCache
+
+# Same question, different wording: must be answered from the cache
+MUST_HIT = [
+    ("best food in Myeongdong for kids", "kid-friendly restaurants Myeongdong"),
+    ("kid-friendly restaurants in Myeongdong", "restaurants for kids in Myeongdong"),
+    ("What are the best kid-friendly restaurants in Myeongdong?", "kid friendly restaurants in myeongdong"),
+    ("cheap hotels near Hongdae", "budget hotel near hongdae"),
+    ("How do I get from Seoul to Busan", "how to get from seoul to busan?"),
+    ("명동 아이와 갈만한 맛집", "명동에서 아이와 갈만한 맛집"),
+    ("서울에서 부산 가는 방법", "서울에서 부산까지 가는 방법"),
+    ("We are a family of 4 visiting Seoul, what museums can we visit with young children",
+     "we're a family of four visiting seoul - which museums can we visit with young children?"),
+]
+
+# Similar words, different question: serving the cached answer would be wrong
+MUST_MISS = [
+    ("How do I get from Seoul to Busan", "How do I get from Busan to Seoul"),
+    ("Busan to Jeju ferry", "Jeju to Busan ferry"),
+    ("서울에서 부산 가는 방법", "부산에서 서울 가는 방법"),
+    ("spicy restaurants in Myeongdong", "spicy restaurants in Myeongdong that are not spicy"),
+    ("spicy restaurants in Myeongdong", "restaurants in Myeongdong that aren't spicy"),
+    ("매운 음식 맛집", "맵지 않은 음식 맛집"),
+    ("kid-friendly restaurants in Myeongdong", "kid-friendly restaurants in Gangnam"),
+    ("hotels in Seoul", "restaurants in Seoul"),
+    # Long questions differing only in a place or a number
+    ("We are a family of four visiting Seoul in spring, what are the best museums and palaces to visit "
+     "with young children", "We are a family of four visiting Busan in spring, what are the best museums "
+     "and palaces to visit with young children"),
+    ("We are a family of four visiting Seoul, what are the best museums and palaces to visit with young "
+     "children", "We are a family of four visiting Busan, what are the best museums and palaces to visit "
+     "with young children"),
+    ("We are a family of four visiting Seoul in spring, what are the best museums and palaces to visit "
+     "with young children", "We are a family of five visiting Seoul in spring, what are the best museums "
+     "and palaces to visit with young children"),
+    ("What should we do on day three of our Jeju trip with two kids and grandparents",
+     "What should we do on day 4 of our Jeju trip with two kids and grandparents"),
+    ("아이 둘과 봄에 서울 여행 가는데 아이들과 가볼만한 박물관과 궁궐 추천해 주세요",
+     "아이 둘과 봄에 부산 여행 가는데 아이들과 가볼만한 박물관과 궁궐 추천해 주세요"),
+]
+
+
+def make_cache() -> SemanticCache:
+    return SemanticCache(maxsize=16, ttl=60, threshold=settings.guide_cache_threshold)
+
+
+@pytest.mark.parametrize("stored, asked", MUST_HIT)
+def test_rewordings_hit(stored, asked):
+    cache = make_cache()
+    cache.set("en|seoul", stored, "answer")
+    assert cache.get("en|seoul", asked) is not None
+
+
+@pytest.mark.parametrize("stored, asked", MUST_MISS)
+def test_different_questions_miss(stored, asked):
+    cache = make_cache()
+    cache.set("en|seoul", stored, "answer")
+    assert cache.get("en|seoul", asked) is None
+    # Either way round
+    cache = make_cache()
+    cache.set("en|seoul", asked, "answer")
+    assert cache.get("en|seoul", stored) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SemanticCache(maxsize=2, ttl=60, threshold=0.85)
+    cache.set("p", "hotels in Seoul", "hotels")
+    cache.set("p", "restaurants in Busan", "restaurants")
+    assert cache.get("p", "hotels in Seoul") is not None
+    cache.set("p", "cafes in Jeju", "cafes")
+    assert cache.get("p", "restaurants in Busan") is None
+    assert cache.get("p", "hotels in Seoul") is not None
+    assert len(cache) == 2
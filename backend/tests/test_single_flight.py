@@ -0,0 +1,41 @@
+"""Single-flight coalescing of identical concurrent Gemini calls"""
+
+import asyncio
+
+from app.services.gemini_service import GeminiService
+from app.services.scheduler import PriorityScheduler
+from benchmarks.fakes import FakeModel, Latency
+
+PROMPT = "Plan a three day family trip to Busan"
+
+
+def make_service(model: FakeModel) -> GeminiService:
+    service = GeminiService(model_factory=lambda name: model)
+    service.scheduler = PriorityScheduler(rate=0, burst=1, max_queue=100)
+    return service
+
+
+def test_identical_calls_share_one_upstream_call():
+    model = FakeModel(Latency(50))
+    service = make_service(model)
+
+    async def run():
+        return await asyncio.gather(*(service._generate(PROMPT, "guide") for _ in range(3)))
+
+    results = asyncio.run(run())
+    assert len(set(results)) == 1
+    assert model.calls == 1
+    assert service.coalesced_calls == 2
+
+
+def test_operations_with_different_settings_do_not_share_calls():
+    model = FakeModel(Latency(50), output_chars=12000)
+    service = make_service(model)
+
+    async def run():
+        return await asyncio.gather(service._generate(PROMPT, "guide"), service._generate(PROMPT, "guide_job"))
+
+    guide, guide_job = asyncio.run(run())
+    assert model.calls == 2
+    # Each got its own max_output_tokens (2048 vs 4096; the fake cuts at 4 characters per token)
+    assert len(guide) < len(guide_job)
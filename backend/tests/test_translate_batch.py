@@ -0,0 +1,66 @@
+"""Batch translation chunking and recovery from unusable batch answers"""
+
+import asyncio
+import json
+
+from app.config import settings
+from app.models.translation import TranslationRequest
+from app.services.gemini_service import GeminiService
+from app.services.scheduler import PriorityScheduler
+from benchmarks.fakes import FakeModel, Latency
+
+
+class BrokenBatchModel(FakeModel):
+    """Answers batches of more than `max_items` items with a cut-off JSON array"""
+
+    def __init__(self, max_items: int):
+        super().__init__(Latency(10))
+        self.max_items = max_items
+        self.batch_sizes = []
+
+    def _answer(self, prompt: str) -> str:
+        answer = super()._answer(prompt)
+        if "Items:\n" in prompt:
+            size = len(json.loads(prompt.split("Items:\n", 1)[1]))
+            self.batch_sizes.append(size)
+            if size > self.max_items:
+                return answer[:len(answer) // 2]
+        return answer
+
+
+def make_service(model: FakeModel) -> GeminiService:
+    service = GeminiService(model_factory=lambda name: model)
+    service.scheduler = PriorityScheduler(rate=0, burst=1, max_queue=100)
+    return service
+
+
+def menu(count: int, chars: int = 60):
+    return [
+        TranslationRequest(text=f"Menu item {number}:" + " grilled pork with kimchi" * (chars // 25),
+                           source_lang="en", target_lang="ko")
+        for number in range(count)
+    ]
+
+
+def test_unusable_batch_answer_is_split_in_halves():
+    model = BrokenBatchModel(max_items=2)
+    service = make_service(model)
+    requests = menu(8)
+
+    results = asyncio.run(service.translate_batch(requests))
+    assert [result.translated_text for result in results] == [f"[ko] {request.text}" for request in requests]
+    # 8 -> 4 + 4 -> 2 + 2 + 2 + 2, instead of one call per item at once
+    assert sorted(model.batch_sizes) == [2, 2, 2, 2, 4, 4, 8]
+
+
+def test_batches_are_split_to_fit_the_output_token_cap(monkeypatch):
+    monkeypatch.setitem(settings.gemini_model_routes, "translate", {"max_output_tokens": 256})
+    # The fake cuts answers at max_output_tokens, like the API
+    model = FakeModel(Latency(10))
+    service = make_service(model)
+    requests = menu(12, chars=100)
+
+    results = asyncio.run(service.translate_batch(requests))
+    assert [result.translated_text for result in results] == [f"[ko] {request.text}" for request in requests]
+    # Every chunk's answer fit, so none had to be split again
+    assert 1 < model.calls < len(requests)
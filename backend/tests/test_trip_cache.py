@@ -0,0 +1,51 @@
+"""Read-through trip cache consistency against the fake Firestore"""
+
+import asyncio
+
+from app.services.firebase_service import FirebaseService
+from benchmarks.fakes import FakeDocument, FakeFirestore, FakeSnapshot, Latency, _copy_document
+
+
+def make_service() -> FirebaseService:
+    service = FirebaseService()
+    service._db = FakeFirestore(Latency(1))
+    service.is_initialized = True
+    return service
+
+
+def test_read_started_before_an_update_is_not_cached(monkeypatch):
+    async def slow_get(self):
+        # The document is read first and arrives later, like a slow RPC
+        snapshot = FakeSnapshot(self, _copy_document(self._store.get(self.id)))
+        await asyncio.sleep(0.1)
+        return snapshot
+
+    monkeypatch.setattr(FakeDocument, "get", slow_get)
+    service = make_service()
+
+    async def run():
+        trip_id = await service.create_trip({"title": "Old"})
+        service._trip_cache.pop(trip_id)
+        read = asyncio.ensure_future(service.get_trip(trip_id))
+        await asyncio.sleep(0.01)
+        await service.update_trip(trip_id, {"title": "New"})
+        assert (await read)["title"] == "Old"
+        return await service.get_trip(trip_id)
+
+    assert asyncio.run(run())["title"] == "New"
+    assert service._trip_reads == {}
+
+
+def test_read_without_changes_is_cached():
+    service = make_service()
+
+    async def run():
+        trip_id = await service.create_trip({"title": "Trip"})
+        service._trip_cache.pop(trip_id)
+        await service.get_trip(trip_id)
+        rpcs = service._db.rpcs
+        assert (await service.get_trip(trip_id))["title"] == "Trip"
+        return rpcs, service._db.rpcs
+
+    before, after = asyncio.run(run())
+    assert after == before
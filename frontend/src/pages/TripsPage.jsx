@@ -20,15 +20,9 @@ const TripsPage = ({ user }) => {
 
     const loadTrips = async () => {
         try {
-            const [myTrips, participantTrips] = await Promise.all([
-                apiService.getUserTrips(),
-                apiService.getParticipantTrips(),
-            ]);
-
-            const allTrips = [...myTrips, ...participantTrips];
-            const uniqueTrips = Array.from(new Map(allTrips.map(trip => [trip.id, trip])).values());
-
-            setTrips(uniqueTrips);
+            // Created and participant trips, already merged and deduplicated by the API
+            const allTrips = await apiService.getAllMyTrips();
+            setTrips(allTrips);
         } catch (error) {
             console.error('Error loading trips:', error);
         } finally {
@@ -39,6 +39,12 @@ export const apiService = {
         return response.data;
     },
 
+    // items: [{ text, source_lang, target_lang, context }] - translated in as few Gemini calls as possible
+    translateBatch: async (items) => {
+        const response = await api.post('/translate/batch', { items });
+        return response.data;
+    },
+
     // AI Guide
     getAIGuide: async (query, language = 'en', location = null, tripDates = null, preferences = null) => {
         const response = await api.post('/ai-guide', {
@@ -79,13 +85,21 @@ export const apiService = {
         return response.data;
     },
 
-    getUserTrips: async () => {
-        const response = await api.get('/trips');
+    // params: { limit, start_after, fields } - see X-Next-Cursor response header for the next page
+    getUserTrips: async (params = {}) => {
+        const response = await api.get('/trips', { params });
+        return response.data;
+    },
+
+    // params: { limit, start_after, fields } - see X-Next-Cursor response header for the next page
+    getParticipantTrips: async (params = {}) => {
+        const response = await api.get('/trips/participant/me', { params });
         return response.data;
     },
 
-    getParticipantTrips: async () => {
-        const response = await api.get('/trips/participant/me');
+    // Trips the user created or participates in, merged and deduplicated
+    getAllMyTrips: async (params = {}) => {
+        const response = await api.get('/trips/me', { params });
         return response.data;
     },
 };